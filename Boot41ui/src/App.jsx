@@ -1,6 +1,7 @@
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom'
 import Navbar from './components/Navbar'
 import Employees from './pages/Employees'
+import EmployeeProfile from './pages/EmployeeProfile'
 import Assignments from './pages/Assignments'
 import Landing from './pages/Landing'
 import './index.css'
@@ -14,6 +15,7 @@ function App() {
           <div className="mx-auto max-w-7xl">
             <Routes>
               <Route path="/employees" element={<Employees />} />
+              <Route path="/employees/:id" element={<EmployeeProfile />} />
               <Route path="/assignments" element={<Assignments />} />
               <Route path="/" element={<Landing />} />
             </Routes>
@@ -55,7 +55,7 @@ export default function EmployeeList() {
       <ul role="list" className="divide-y divide-gray-200">
         {employees.map((employee) => (
           <li key={employee.email}>
-            <Link to={`/employees/${employee.email}`} className="block hover:bg-gray-50">
+            <Link to={`/employees/${employee.id}`} className="block hover:bg-gray-50">
               <div className="px-4 py-4 sm:px-6">
                 <div className="flex items-center justify-between">
                   <div className="flex items-center">
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
-import { getEmployee, getEmployeeAssignments, getEmployeeEvaluations } from '../services/api';
+import { getEmployeeProfile } from '../services/api';
 
 function getStatusColor(status) {
   switch (status) {
@@ -18,7 +18,7 @@ function getStatusColor(status) {
 }
 
 export default function EmployeeProfile() {
-  const { email } = useParams();
+  const { id } = useParams();
   const [employee, setEmployee] = useState(null);
   const [assignments, setAssignments] = useState([]);
   const [evaluations, setEvaluations] = useState([]);
@@ -28,14 +28,10 @@ export default function EmployeeProfile() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [employeeData, assignmentsData, evaluationsData] = await Promise.all([
-          getEmployee(email),
-          getEmployeeAssignments(email),
-          getEmployeeEvaluations(email),
-        ]);
-        setEmployee(employeeData);
-        setAssignments(assignmentsData);
-        setEvaluations(evaluationsData);
+        const profile = await getEmployeeProfile(id);
+        setEmployee(profile.employee);
+        setAssignments(profile.assigned_assignments);
+        setEvaluations(profile.evaluations);
         setLoading(false);
       } catch (err) {
         setError(err.message);
@@ -44,7 +40,7 @@ export default function EmployeeProfile() {
     };
 
     fetchData();
-  }, [email]);
+  }, [id]);
 
   if (loading) {
     return (
@@ -78,7 +74,7 @@ export default function EmployeeProfile() {
     return (
       <div className="text-center py-12">
         <h3 className="mt-2 text-sm font-medium text-gray-900">No employee found</h3>
-        <p className="mt-1 text-sm text-gray-500">Could not find an employee with the specified email.</p>
+        <p className="mt-1 text-sm text-gray-500">Could not find the specified employee.</p>
       </div>
     );
   }
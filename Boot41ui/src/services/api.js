@@ -28,3 +28,8 @@ export const getEmployeeEvaluations = async (email) => {
   const response = await api.get(`/evaluations/?employee=${email}`);
   return response.data;
 };
+
+export const getEmployeeProfile = async (id) => {
+  const response = await api.get(`/employees/${id}/profile/`);
+  return response.data;
+};
@@ -4,6 +4,8 @@ Django settings for boot41Server project.
 
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -26,8 +28,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'schema.middleware.AdmissionControlMiddleware',
+    'schema.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'schema.middleware.TenantMiddleware',
+    'schema.middleware.WriteLaneMiddleware',
+    'schema.middleware.AuditFlushMiddleware',
 ]
 
 ROOT_URLCONF = 'boot41Server.urls'
@@ -42,6 +49,23 @@ DATABASES = {
     }
 }
 
+# Per-organization shards (see schema/routers.py). Add an alias to DATABASES
+# and list it here to make it available to manage.py move_org.
+SCHEMA_SHARDS = ['default']
+DATABASE_ROUTERS = ['schema.routers.TenantRouter']
+
+# PRAGMAs run on every new SQLite connection (see schema/sqlite.py); cache_size < 0 is KiB
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+# Serialize POST/PUT/PATCH/DELETE requests per process while reads run concurrently
+SQLITE_WRITE_LANE = True
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -61,8 +85,120 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [],
     'DEFAULT_PERMISSION_CLASSES': [],
     'UNAUTHENTICATED_USER': None,
+    'DEFAULT_RENDERER_CLASSES': [
+        'schema.renderers.ORJSONRenderer',
+        'schema.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'schema.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'schema.renderers.ORJSONParser',
+        'schema.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Caches; throttle buckets and the shard directory must be visible to every worker process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'throttle',
+    },
+    'directory': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'directory',
+    },
+}
+
+# Cache alias for organization -> shard lookups (see schema/routers.py)
+SCHEMA_SHARD_CACHE = 'directory'
+
+# Token-bucket throttling (see schema/throttling.py); costs are per view action
+SCHEMA_THROTTLE = {
+    'ENABLED': True,
+    'CACHE': 'throttle',
+    'CLIENT': {'capacity': 600, 'refill_per_second': 10},
+    'ENDPOINT': {'capacity': 3000, 'refill_per_second': 50},
+    'COSTS': {
+        'default': 1,
+        'list': 5,
+        'by_organization': 10,
+        'by_employee': 5,
+        'my_assignments': 5,
+        'pending': 5,
+        'in_progress': 5,
+        'submitted': 5,
+        'evaluated': 5,
+        'deadline_approaching': 5,
+        'overdue': 5,
+        'archived': 10,
+        'profile': 3,
+        'export': 20,
+        'bulk_grade': 20,
+    },
+}
+
+# Per-process concurrency limits; low-priority list reads are shed first
+ADMISSION_CONTROL = {
+    'ENABLED': True,
+    'MAX_CONCURRENT': 64,
+    'MAX_CONCURRENT_LOW_PRIORITY': 16,
+    'RETRY_AFTER': 1,
 }
 
+# Responses at least this large are brotli/gzip compressed when the client accepts it
+RESPONSE_COMPRESSION_MIN_SIZE = 1024
+RESPONSE_COMPRESSION_GZIP_LEVEL = 6
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 4
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-organization-id')
+
+# Idempotency-Key replay window and how long a retry waits for the first request
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+
+# Background jobs (see schema/jobs.py); running jobs bump updated_at every
+# JOB_HEARTBEAT_SECONDS and are requeued (or failed) after JOB_STALE_AFTER without one
+JOB_HEARTBEAT_SECONDS = 60
+JOB_STALE_AFTER = 300
+
+# Deadline sweeper (see schema/deadlines.py)
+DEADLINE_DUE_SOON_DAYS = 3
+DEADLINE_SCHEDULER_MAX_SLEEP = 300
+
+# Submission bodies larger than this many bytes are stored zlib-compressed
+SUBMISSION_COMPRESS_ABOVE = 1024
+
+# Evaluated assignments older than this move to the archive table (see schema/archive.py)
+ARCHIVE_EVALUATED_AFTER_DAYS = 180
+
+# Entries kept by the in-process employee email -> id resolver (see schema/resolvers.py)
+EMPLOYEE_EMAIL_CACHE_SIZE = 4096
+# Seconds a resolved email is trusted; bounds staleness after changes made in other processes
+EMPLOYEE_EMAIL_CACHE_SECONDS = 60
+
+# Assignment transition log (see schema/audit.py): flush after this many rows or seconds
+AUDIT_BUFFER_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 2.0
+
+# Near-duplicate submissions (see schema/similarity.py): MinHash permutations, LSH bands,
+# words per shingle and the estimated Jaccard similarity reported as a match
+SIMILARITY_NUM_PERM = 128
+SIMILARITY_BANDS = 32
+SIMILARITY_SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.5
+
+# Worker processes used by the autograde job (see schema/grading.py)
+AUTOGRADE_PROCESSES = 4
+
+# Recurring assignment templates are materialized this far ahead (see schema/recurrence.py)
+ASSIGNMENT_TEMPLATE_AHEAD_DAYS = 14
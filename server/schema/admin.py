@@ -1,6 +1,9 @@
 # server/schema/admin.py
 from django.contrib import admin
-from .models import Organization, Employee, Assignment, AssignmentEvaluation
+from .models import (
+    Organization, Employee, Assignment, AssignmentEvaluation, Job, Notification, Submission, TenantShard,
+    ArchivedAssignment
+)
 
 @admin.register(Organization)
 class OrganizationAdmin(admin.ModelAdmin):
@@ -30,4 +33,33 @@ class AssignmentEvaluationAdmin(admin.ModelAdmin):
     list_display = ('assignment', 'score', 'evaluation_date')
     list_filter = ('assignment__status',)
     search_fields = ('assignment__title', 'feedback')
-    raw_id_fields = ('assignment',)
\ No newline at end of file
+    raw_id_fields = ('assignment',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'progress', 'total', 'attempts', 'worker', 'created_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('result', 'error', 'started_at', 'finished_at')
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('assignment', 'employee', 'kind', 'created_at', 'read_at')
+    list_filter = ('kind',)
+    raw_id_fields = ('assignment', 'employee')
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ('assignment', 'size', 'is_compressed', 'updated_at')
+    exclude = ('body',)
+    raw_id_fields = ('assignment',)
+
+@admin.register(TenantShard)
+class TenantShardAdmin(admin.ModelAdmin):
+    list_display = ('organization_id', 'alias', 'updated_at')
+    list_filter = ('alias',)
+
+@admin.register(ArchivedAssignment)
+class ArchivedAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('title', 'organization_id', 'score', 'evaluation_date', 'archived_at')
+    exclude = ('submission_body',)
+    search_fields = ('title',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SchemaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'schema'
+
+    def ready(self):
+        # register background job handlers, signal receivers and SQLite connection tuning
+        from . import signals, sqlite, tasks  # noqa: F401
@@ -0,0 +1,109 @@
+# archive.py
+"""Hot/cold archival of evaluated assignments.
+
+Each batch copies assignments, their evaluation, submission and assignee ids
+into ``ArchivedAssignment`` and deletes the originals in one transaction, so
+the live tables and their indexes only hold work that is still moving.
+Every shard is archived in turn.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from . import routers
+from .models import (
+    ArchivedAssignment, Assignment, AssignmentEvaluation, Notification, Submission, SubmissionAttachment,
+    Rubric, SubmissionBucket, SubmissionSignature
+)
+
+
+def archive_cutoff(older_than_days=None):
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'ARCHIVE_EVALUATED_AFTER_DAYS', 180)
+    return timezone.now() - timedelta(days=older_than_days)
+
+
+def archive_evaluated(older_than_days=None, batch_size=500, progress=None):
+    cutoff = archive_cutoff(older_than_days)
+    archived = 0
+    for alias in routers.each_shard():
+        candidates = Assignment.objects.filter(status='EVALUATED', evaluation__evaluation_date__lt=cutoff)
+        while True:
+            with transaction.atomic(using=router.db_for_write(Assignment)):
+                batch = list(
+                    candidates.select_related('evaluation', 'submission').order_by('id')[:batch_size]
+                )
+                if batch:
+                    _archive_batch(batch)
+            if not batch:
+                break
+            archived += len(batch)
+            if progress:
+                progress(archived)
+    return archived
+
+
+def _archive_batch(assignments):
+    ids = [assignment.id for assignment in assignments]
+    through = Assignment.assigned_to.through
+
+    assignees = defaultdict(list)
+    for assignment_id, employee_id in through.objects.filter(assignment_id__in=ids).values_list(
+        'assignment_id', 'employee_id'
+    ):
+        assignees[assignment_id].append(employee_id)
+    attachments = defaultdict(list)
+    for row in SubmissionAttachment.objects.filter(submission__assignment_id__in=ids).values(
+        'submission__assignment_id', 'file', 'original_name', 'content_type', 'size', 'sha256'
+    ):
+        attachments[row.pop('submission__assignment_id')].append(row)
+
+    ArchivedAssignment.objects.bulk_create([
+        _to_archive(assignment, assignees[assignment.id], attachments[assignment.id])
+        for assignment in assignments
+    ])
+
+    # children first; _raw_delete avoids the collector loading every related row
+    for queryset in (
+        Notification.objects.filter(assignment_id__in=ids),
+        SubmissionBucket.objects.filter(assignment_id__in=ids),
+        Rubric.objects.filter(assignment_id__in=ids),
+        SubmissionSignature.objects.filter(assignment_id__in=ids),
+        SubmissionAttachment.objects.filter(submission__assignment_id__in=ids),
+        Submission.objects.filter(assignment_id__in=ids),
+        AssignmentEvaluation.objects.filter(assignment_id__in=ids),
+        through.objects.filter(assignment_id__in=ids),
+        Assignment.objects.filter(id__in=ids),
+    ):
+        queryset._raw_delete(queryset.db)
+
+
+def _to_archive(assignment, assignee_ids, attachments):
+    archived = ArchivedAssignment(
+        id=assignment.id,
+        title=assignment.title,
+        description=assignment.description,
+        organization_id=assignment.organization_id,
+        created_by_id=assignment.created_by_id,
+        assigned_to_ids=assignee_ids,
+        start_date=assignment.start_date,
+        end_date=assignment.end_date,
+        status=assignment.status,
+        submission_date=assignment.submission_date,
+        attachments=attachments,
+        created_at=assignment.created_at,
+        updated_at=assignment.updated_at,
+    )
+    evaluation = getattr(assignment, 'evaluation', None)
+    if evaluation is not None:
+        archived.score = evaluation.score
+        archived.feedback = evaluation.feedback
+        archived.evaluation_date = evaluation.evaluation_date
+    submission = getattr(assignment, 'submission', None)
+    if submission is not None:
+        archived.submission_body = bytes(submission.body)
+        archived.submission_is_compressed = submission.is_compressed
+    return archived
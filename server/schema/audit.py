@@ -0,0 +1,75 @@
+# audit.py
+"""Write-behind buffer for the assignment transition log.
+
+A transition is buffered once the transaction that changed the status
+commits (``transaction.on_commit``), so rolled-back changes are never
+logged. Each thread has its own buffer, written with one ``bulk_create`` per
+shard once ``AUDIT_BUFFER_SIZE`` rows are pending or the oldest row is
+``AUDIT_FLUSH_INTERVAL`` seconds old. ``AuditFlushMiddleware`` flushes at
+the end of every request and ``jobs.run_job`` at the end of every job; code
+changing statuses elsewhere should call ``audit_log.flush()`` when done.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import AssignmentTransition
+
+
+class AuditBuffer:
+    def __init__(self, max_size=None, max_age=None):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._local = threading.local()
+
+    def _pending(self):
+        if not hasattr(self._local, 'pending'):
+            self._local.pending = []
+            self._local.oldest = None
+        return self._local.pending
+
+    def record(self, assignment, from_status, to_status, actor_id=None):
+        alias = assignment._state.db or router.db_for_write(AssignmentTransition, instance=assignment)
+        entry = AssignmentTransition(
+            assignment_id=assignment.pk,
+            actor_id=actor_id,
+            from_status=from_status or '',
+            to_status=to_status,
+            created_at=timezone.now(),
+        )
+        transaction.on_commit(lambda: self._append(alias, entry), using=alias)
+
+    def _append(self, alias, entry):
+        pending = self._pending()
+        pending.append((alias, entry))
+        if self._local.oldest is None:
+            self._local.oldest = time.monotonic()
+        max_size = self.max_size or getattr(settings, 'AUDIT_BUFFER_SIZE', 500)
+        max_age = self.max_age or getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0)
+        if len(pending) >= max_size or time.monotonic() - self._local.oldest >= max_age:
+            self.flush()
+
+    def flush(self):
+        """Write everything this thread has pending; returns the number of rows written"""
+        pending = self._pending()
+        by_alias = defaultdict(list)
+        for alias, entry in pending:
+            by_alias[alias].append(entry)
+        written = 0
+        for alias, entries in by_alias.items():
+            AssignmentTransition.objects.using(alias).bulk_create(entries, batch_size=500)
+            # drop entries only once they are written, so a failed write keeps them
+            pending[:] = [item for item in pending if item[0] != alias]
+            written += len(entries)
+        self._local.oldest = None
+        return written
+
+    def __len__(self):
+        return len(self._pending())
+
+
+audit_log = AuditBuffer()
@@ -0,0 +1,48 @@
+# batching.py
+"""Batch pipelines for CPU-bound backfills (auto-grading, similarity indexing).
+
+Rows are read in keyset-paginated batches, ``WHERE id > last_id ORDER BY id
+LIMIT n``, so every batch is an index range scan however far the backfill
+has got. Batches are processed on a process pool while this process keeps
+all reads and writes, and at most two batches per worker are in flight, so
+memory stays bounded while the workers are kept busy.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+
+def keyset_batches(rows, batch_size):
+    """Lists of up to ``batch_size`` rows of a ``values_list`` queryset whose first column is ``id``"""
+    rows = rows.order_by('id')
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def run_batches(func, batches, processes, consume):
+    """Call ``consume(func(batch))`` for every batch, in order.
+
+    With more than one process ``func`` runs in a ``ProcessPoolExecutor``
+    and must not touch the database.
+    """
+    if processes <= 1:
+        for batch in batches:
+            consume(func(batch))
+        return
+
+    # children must not inherit an open database connection
+    connections.close_all()
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for batch in batches:
+            in_flight.append(pool.submit(func, batch))
+            while len(in_flight) >= processes * 2:
+                consume(in_flight.popleft().result())
+        while in_flight:
+            consume(in_flight.popleft().result())
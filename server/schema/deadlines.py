@@ -0,0 +1,78 @@
+# deadlines.py
+"""Deadline sweeper.
+
+Assignments are flagged (and their assignees notified) once when they come
+due soon and once when they become overdue. The scheduler asks the database
+for the next deadline boundary instead of rescanning on a fixed interval.
+Both walk every shard.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import routers
+from .models import Assignment, Notification
+
+ACTIVE_STATUSES = ['PENDING', 'IN_PROGRESS']
+
+
+def due_soon_window():
+    return timedelta(days=getattr(settings, 'DEADLINE_DUE_SOON_DAYS', 3))
+
+
+def _active():
+    return Assignment.objects.filter(status__in=ACTIVE_STATUSES)
+
+
+def next_boundary():
+    """Earliest moment at which some assignment becomes due soon or overdue"""
+    boundaries = []
+    for alias in routers.each_shard():
+        active = _active()
+        next_overdue = active.filter(overdue_flagged_at__isnull=True).aggregate(at=Min('end_date'))['at']
+        next_due_soon = active.filter(
+            overdue_flagged_at__isnull=True, due_soon_notified_at__isnull=True
+        ).aggregate(at=Min('end_date'))['at']
+        boundaries += [at for at in (next_overdue, next_due_soon and next_due_soon - due_soon_window()) if at]
+    return min(boundaries) if boundaries else None
+
+
+def sweep(now=None, batch_size=500):
+    now = now or timezone.now()
+    result = {'overdue': 0, 'due_soon': 0}
+    for alias in routers.each_shard():
+        overdue = _active().filter(overdue_flagged_at__isnull=True, end_date__lte=now)
+        due_soon = _active().filter(
+            overdue_flagged_at__isnull=True,
+            due_soon_notified_at__isnull=True,
+            end_date__gt=now,
+            end_date__lte=now + due_soon_window(),
+        )
+        result['overdue'] += _flag_and_notify(overdue, 'overdue_flagged_at', 'OVERDUE', now, batch_size)
+        result['due_soon'] += _flag_and_notify(due_soon, 'due_soon_notified_at', 'DUE_SOON', now, batch_size)
+    return result
+
+
+def _flag_and_notify(queryset, flag_field, kind, now, batch_size):
+    through = Assignment.assigned_to.through
+    processed = 0
+    while True:
+        # flagged rows drop out of the queryset, so each pass sees the next batch
+        ids = list(queryset.order_by('end_date', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return processed
+        with transaction.atomic(using=router.db_for_write(Assignment)):
+            Assignment.objects.filter(id__in=ids, **{f'{flag_field}__isnull': True}).update(**{flag_field: now})
+            assignees = through.objects.filter(assignment_id__in=ids).values_list('assignment_id', 'employee_id')
+            Notification.objects.bulk_create(
+                [
+                    Notification(assignment_id=assignment_id, employee_id=employee_id, kind=kind, created_at=now)
+                    for assignment_id, employee_id in assignees.iterator()
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        processed += len(ids)
@@ -0,0 +1,144 @@
+# grading.py
+"""Rubric-based auto-grading of submitted assignments.
+
+Each rubric is compiled once, in this process, into regular expressions.
+Submissions are scored in batches on a process pool (see batching.py), and
+the results are written as draft ``AssignmentEvaluation`` rows with
+``bulk_create``. Drafts skip ``save()``, so the assignment stays SUBMITTED
+until an admin confirms the draft.
+
+A submission earns the weight of every keyword it contains and every check
+it matches, plus ``length_weight`` when its word count is within the
+rubric's bounds. The score is the percentage of the achievable weight.
+"""
+import re
+import time
+import zlib
+
+from django.utils import timezone
+
+from .batching import keyset_batches, run_batches
+from .models import Assignment, AssignmentEvaluation
+
+_word = re.compile(r'\w+')
+
+
+class CompiledRubric:
+    def __init__(self, keywords=None, checks=None, min_words=None, max_words=None, length_weight=10):
+        self.keywords = [
+            (keyword, re.compile(rf'\b{re.escape(keyword)}\b', re.IGNORECASE), weight)
+            for keyword, weight in (keywords or {}).items()
+        ]
+        self.checks = [
+            (check.get('label') or check['pattern'], re.compile(check['pattern'], re.MULTILINE), check.get('weight', 1))
+            for check in (checks or [])
+        ]
+        self.min_words = min_words
+        self.max_words = max_words
+        self.length_weight = length_weight if (min_words or max_words) else 0
+        self.possible = (
+            sum(weight for _, _, weight in self.keywords)
+            + sum(weight for _, _, weight in self.checks)
+            + self.length_weight
+        )
+
+    def grade(self, text):
+        """``(score, feedback)`` for a submission"""
+        earned, notes = 0, []
+        for keyword, pattern, weight in self.keywords:
+            if pattern.search(text):
+                earned += weight
+            else:
+                notes.append(f'Missing keyword: {keyword}')
+        for label, pattern, weight in self.checks:
+            if pattern.search(text):
+                earned += weight
+            else:
+                notes.append(f'Failed check: {label}')
+        if self.length_weight:
+            words = len(_word.findall(text))
+            if self.min_words and words < self.min_words:
+                notes.append(f'Too short: {words} words, expected at least {self.min_words}')
+            elif self.max_words and words > self.max_words:
+                notes.append(f'Too long: {words} words, expected at most {self.max_words}')
+            else:
+                earned += self.length_weight
+        score = min(100, max(0, round(100 * earned / self.possible))) if self.possible > 0 else 0
+        return score, '\n'.join(['Auto-graded draft.'] + notes)
+
+
+def compile_rubric(rubric):
+    """CompiledRubric from a Rubric instance or a dict of its fields"""
+    if not isinstance(rubric, dict):
+        rubric = {
+            'keywords': rubric.keywords, 'checks': rubric.checks, 'min_words': rubric.min_words,
+            'max_words': rubric.max_words, 'length_weight': rubric.length_weight,
+        }
+    return CompiledRubric(**rubric)
+
+
+def grade_batch(items):
+    """``(assignment_id, rubric, body, is_compressed)`` items to ``(assignment_id, score, feedback)``.
+
+    Needs no database access, so it runs in worker processes.
+    """
+    results = []
+    for assignment_id, rubric, body, is_compressed in items:
+        body = bytes(body) if body is not None else b''
+        text = (zlib.decompress(body) if is_compressed else body).decode('utf-8')
+        results.append((assignment_id, *rubric.grade(text)))
+    return results
+
+
+def _pending(organization_id, batch_size, regrade):
+    assignments = Assignment.objects.filter(
+        organization_id=organization_id, status='SUBMITTED', rubric__isnull=False
+    )
+    if not regrade:
+        assignments = assignments.filter(evaluation__isnull=True)
+    rows = assignments.values_list(
+        'id', 'rubric__keywords', 'rubric__checks', 'rubric__min_words', 'rubric__max_words',
+        'rubric__length_weight', 'submission__body', 'submission__is_compressed',
+    )
+    for batch in keyset_batches(rows, batch_size):
+        yield [
+            (assignment_id, CompiledRubric(keywords, checks, min_words, max_words, length_weight),
+             body, bool(is_compressed))
+            for assignment_id, keywords, checks, min_words, max_words, length_weight, body, is_compressed in batch
+        ]
+
+
+def _write_drafts(results):
+    ids = [assignment_id for assignment_id, _, _ in results]
+    # regrading replaces earlier drafts, never a confirmed evaluation
+    AssignmentEvaluation.objects.filter(assignment_id__in=ids, is_draft=True).delete()
+    now = timezone.now()
+    AssignmentEvaluation.objects.bulk_create([
+        AssignmentEvaluation(
+            assignment_id=assignment_id, score=score, feedback=feedback, is_draft=True,
+            evaluation_date=now, created_at=now,
+        )
+        for assignment_id, score, feedback in results
+    ], batch_size=500)
+    return len(results)
+
+
+def autograde(organization_id, processes=1, batch_size=200, regrade=False, progress=None):
+    """Score every SUBMITTED assignment with a rubric and write draft evaluations"""
+    started = time.monotonic()
+    graded = 0
+
+    def written(results):
+        nonlocal graded
+        graded += _write_drafts(results)
+        if progress:
+            progress(graded)
+
+    run_batches(grade_batch, _pending(organization_id, batch_size, regrade), processes, written)
+
+    elapsed = time.monotonic() - started
+    return {
+        'graded': graded,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(graded / elapsed, 1) if elapsed > 0 else None,
+    }
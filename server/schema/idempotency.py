@@ -0,0 +1,127 @@
+# idempotency.py
+"""Idempotency-Key support for unsafe viewset actions.
+
+The first request with a given key claims an ``IdempotencyRecord``; its
+response (status and compressed body) is stored and replayed to retries
+with the same key and payload. A retry that arrives while the first request
+is still running waits for it instead of repeating the work.
+"""
+import hashlib
+import json
+import random
+import time
+import zlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyRecord
+from .sqlite import outside_write_lane
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+POLL_INTERVAL = 0.05
+PURGE_PROBABILITY = 0.01
+
+
+def purge_expired():
+    return IdempotencyRecord.objects.filter(expires_at__lt=timezone.now()).delete()[0]
+
+
+def _fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _claim(key, scope, request_hash):
+    """Return (record, created)"""
+    now = timezone.now()
+    ttl = timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+    if random.random() < PURGE_PROBABILITY:
+        purge_expired()
+    try:
+        with transaction.atomic():
+            return IdempotencyRecord.objects.create(
+                key=key, scope=scope, request_hash=request_hash, expires_at=now + ttl
+            ), True
+    except IntegrityError:
+        record = IdempotencyRecord.objects.filter(key=key, scope=scope).first()
+        if record is None or record.expires_at < now:
+            # expired (or purged meanwhile): drop it and claim again
+            IdempotencyRecord.objects.filter(key=key, scope=scope, expires_at__lt=now).delete()
+            return _claim(key, scope, request_hash)
+        return record, False
+
+
+def _wait_for(record):
+    deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 10)
+    # only reads here, so don't block other writers in this process meanwhile
+    with outside_write_lane():
+        while not record.is_complete and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            record = IdempotencyRecord.objects.filter(pk=record.pk).first()
+            if record is None:
+                return None
+    return record
+
+
+def _store(record, response):
+    body = json.dumps(response.data, cls=JSONEncoder).encode('utf-8')
+    record.status_code = response.status_code
+    record.response_body = zlib.compress(body)
+    record.save(update_fields=['status_code', 'response_body'])
+
+
+def _replay(record):
+    data = json.loads(zlib.decompress(bytes(record.response_body))) if record.response_body else None
+    return Response(data, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method):
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"error": "Idempotency-Key must be at most 255 characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_hash = _fingerprint(request)
+        record, created = _claim(key, f'{request.method} {request.path}', request_hash)
+        if not created:
+            if record.request_hash != request_hash:
+                return Response(
+                    {"error": "Idempotency-Key was already used with a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            record = _wait_for(record)
+            if record is None:
+                return wrapper(self, request, *args, **kwargs)
+            if not record.is_complete:
+                return Response(
+                    {"error": "A request with this Idempotency-Key is still in progress"},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': '1'}
+                )
+            return _replay(record)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            # let the client retry server errors for real
+            record.delete()
+        else:
+            _store(record, response)
+        return response
+    return wrapper
@@ -0,0 +1,167 @@
+# jobs.py
+"""Database-backed background job queue.
+
+Handlers register with ``@task('name')`` and receive the claimed ``Job``;
+whatever they return is stored as the job result. Only ``public`` kinds can
+be enqueued through ``POST /jobs/``; the rest are enqueued by the views that
+guard them. Workers claim jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED`` where the backend supports it and with
+a compare-and-set ``UPDATE`` otherwise (SQLite). While a job runs, its
+worker bumps ``updated_at`` every ``JOB_HEARTBEAT_SECONDS``; a RUNNING job
+without a heartbeat for ``JOB_STALE_AFTER`` seconds is requeued, or failed
+once its attempts are used up.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .audit import audit_log
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_public = set()
+
+
+def task(name, public=True):
+    def decorator(func):
+        _registry[name] = func
+        if public:
+            _public.add(name)
+        return func
+    return decorator
+
+
+def registered_tasks():
+    return sorted(_registry)
+
+
+def public_tasks():
+    return sorted(_public)
+
+
+def enqueue(kind, payload=None, **fields):
+    if kind not in _registry:
+        raise ValueError(f'Unknown job kind: {kind}')
+    return Job.objects.create(kind=kind, payload=payload or {}, **fields)
+
+
+def worker_name(index=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def claim_next(worker):
+    now = timezone.now()
+    queued = Job.objects.filter(status='QUEUED', run_after__lte=now).order_by('run_after', 'id')
+    claim = {'status': 'RUNNING', 'worker': worker, 'started_at': now, 'updated_at': now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = queued.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1, **claim)
+        job.refresh_from_db()
+        return job
+
+    # No row locks: the status check in the UPDATE decides which worker wins
+    for job_id in queued.values_list('id', flat=True)[:20]:
+        claimed = Job.objects.filter(pk=job_id, status='QUEUED').update(
+            attempts=F('attempts') + 1, **claim
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+@contextmanager
+def heartbeat(job, interval=None):
+    """Keep bumping the running job's ``updated_at`` from a side thread"""
+    if interval is None:
+        interval = getattr(settings, 'JOB_HEARTBEAT_SECONDS', 60)
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                Job.objects.filter(pk=job.pk, status='RUNNING').update(updated_at=timezone.now())
+        finally:
+            # connections are per thread; only closes this one's
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    handler = _registry.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f'Unknown job kind: {job.kind}')
+        with heartbeat(job):
+            result = handler(job)
+        audit_log.flush()
+    except Exception:
+        logger.exception('Job %s failed', job.pk)
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'QUEUED'
+            job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        else:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'run_after', 'finished_at', 'updated_at'])
+        return job
+
+    job.status = 'SUCCEEDED'
+    job.result = result
+    job.error = ''
+    job.finished_at = timezone.now()
+    if job.total is not None:
+        job.progress = job.total
+    job.save(update_fields=['status', 'result', 'error', 'progress', 'finished_at', 'updated_at'])
+    return job
+
+
+def requeue_stale(older_than=None):
+    """Put back jobs whose worker stopped sending heartbeats; fail those out of attempts"""
+    if older_than is None:
+        older_than = timedelta(seconds=getattr(settings, 'JOB_STALE_AFTER', 300))
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', updated_at__lt=now - older_than)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', worker='', error='Worker stopped sending heartbeats', finished_at=now, updated_at=now
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(status='QUEUED', worker='', updated_at=now)
+    return {'requeued': requeued, 'failed': failed}
+
+
+def work(worker, poll_interval=1.0, burst=False, should_stop=lambda: False):
+    """Run jobs until stopped; in burst mode return once the queue is empty"""
+    processed = 0
+    while not should_stop():
+        job = claim_next(worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
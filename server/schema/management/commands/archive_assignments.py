@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from schema.archive import archive_evaluated
+
+
+class Command(BaseCommand):
+    help = 'Move evaluated assignments older than the cutoff into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help='Defaults to ARCHIVE_EVALUATED_AFTER_DAYS')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        archived = archive_evaluated(
+            options['older_than_days'],
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stdout.write(f'Archived {count} assignment(s)'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Done, {archived} assignment(s) archived'))
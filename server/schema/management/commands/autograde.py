@@ -0,0 +1,31 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+
+from schema.grading import autograde
+from schema.routers import use_organization
+
+
+class Command(BaseCommand):
+    help = "Score an organization's submitted assignments against their rubrics as draft evaluations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization_id', type=int)
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--regrade', action='store_true', help='Replace existing drafts')
+
+    def handle(self, *args, **options):
+        organization_id = options['organization_id']
+        with use_organization(organization_id):
+            result = autograde(
+                organization_id,
+                processes=max(1, options['processes']),
+                batch_size=options['batch_size'],
+                regrade=options['regrade'],
+                progress=lambda graded: self.stdout.write(f'Graded {graded} submission(s)'),
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {result["graded"]} draft evaluation(s) in {result["seconds"]}s '
+            f'({result["rows_per_second"]} rows/s)'
+        ))
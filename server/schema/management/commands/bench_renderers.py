@@ -0,0 +1,73 @@
+import gzip
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from schema.models import Assignment, Employee, Organization
+from schema.renderers import MessagePackRenderer, ORJSONRenderer
+from schema.serializers import AssignmentSerializer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = 'Compare render time and bytes on the wire for the assignment list in each format'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000,
+                            help='Synthetic assignments to create (rolled back afterwards); 0 uses existing data')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rows']:
+                self._create_rows(options['rows'])
+            queryset = Assignment.objects.select_related(
+                'organization', 'created_by'
+            ).prefetch_related('assigned_to')
+            data = AssignmentSerializer(queryset, many=True).data
+            self._report(data, options['repeat'])
+            transaction.set_rollback(True)
+
+    def _create_rows(self, rows):
+        org = Organization.objects.create(
+            name=f'bench-{timezone.now().timestamp()}', address='bench',
+            contact_email='bench@example.com', contact_phone='0'
+        )
+        admin = Employee.objects.create(
+            first_name='Bench', last_name='Admin', email=f'bench-{org.pk}@example.com',
+            phone='0', role='ADMIN', organization=org, joining_date=timezone.now().date()
+        )
+        now = timezone.now()
+        assignments = Assignment.objects.bulk_create([
+            Assignment(
+                title=f'Assignment {i}', description='Benchmark assignment ' * 10,
+                organization=org, created_by=admin, start_date=now,
+                end_date=now + timedelta(days=i % 30)
+            )
+            for i in range(rows)
+        ])
+        through = Assignment.assigned_to.through
+        through.objects.bulk_create([through(assignment_id=a.pk, employee_id=admin.pk) for a in assignments])
+
+    def _report(self, data, repeat):
+        renderers = [('json (stdlib)', JSONRenderer()), ('json (orjson)', ORJSONRenderer()),
+                     ('msgpack', MessagePackRenderer())]
+        self.stdout.write(f'{len(data)} rows')
+        self.stdout.write(f"{'format':<16}{'render ms':>10}{'raw bytes':>12}{'gzip bytes':>12}{'br bytes':>12}")
+        for name, renderer in renderers:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = renderer.render(data)
+                timings.append(time.perf_counter() - started)
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            brotlied = len(brotli.compress(body, quality=4)) if brotli else '-'
+            self.stdout.write(f'{name:<16}{min(timings) * 1000:>10.1f}{len(body):>12}{gzipped:>12}{brotlied:>12}')
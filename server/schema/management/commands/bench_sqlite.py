@@ -0,0 +1,120 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from schema.sqlite import apply_pragmas, pragmas, write_lane
+
+STATUSES = ['PENDING', 'IN_PROGRESS', 'SUBMITTED', 'EVALUATED']
+
+
+class Command(BaseCommand):
+    help = 'Compare mixed read/write SQLite throughput with default settings and with SQLITE_PRAGMAS plus the writer lane'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Share of operations that update an assignment status')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['threads']} threads, {options['seconds']}s, {options['rows']} rows, "
+            f"{options['write_ratio']:.0%} writes"
+        )
+        self.stdout.write(f"{'mode':<10}{'reads/s':>10}{'writes/s':>10}{'locked':>8}{'p99 write ms':>14}")
+        for mode, tuned in (('default', False), ('tuned', True)):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self._create(path, options['rows'], tuned)
+                result = self._run(path, tuned, options)
+            self.stdout.write(
+                f"{mode:<10}{result['reads'] / options['seconds']:>10.0f}"
+                f"{result['writes'] / options['seconds']:>10.0f}{result['locked']:>8}"
+                f"{result['p99_write_ms']:>14.1f}"
+            )
+
+    def _connect(self, path, tuned):
+        # same isolation and timeout as Django's SQLite backend
+        connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if tuned:
+            apply_pragmas(connection, pragmas())
+        return connection
+
+    def _create(self, path, rows, tuned):
+        connection = self._connect(path, tuned)
+        connection.execute(
+            'CREATE TABLE assignment (id INTEGER PRIMARY KEY, title TEXT, status TEXT, updated_at REAL)'
+        )
+        connection.execute('CREATE INDEX assignment_status ON assignment (status)')
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO assignment (title, status, updated_at) VALUES (?, ?, ?)',
+            ((f'Assignment {i}', STATUSES[i % len(STATUSES)], time.time()) for i in range(rows)),
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def _run(self, path, tuned, options):
+        deadline = time.monotonic() + options['seconds']
+        totals = {'reads': 0, 'writes': 0, 'locked': 0}
+        write_times = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            connection = self._connect(path, tuned)
+            counts = {'reads': 0, 'writes': 0, 'locked': 0}
+            timings = []
+            while time.monotonic() < deadline:
+                try:
+                    if rng.random() < options['write_ratio']:
+                        started = time.perf_counter()
+                        with write_lane() if tuned else nullcontext():
+                            self._update_status(connection, rng, options['rows'])
+                        timings.append(time.perf_counter() - started)
+                        counts['writes'] += 1
+                    else:
+                        connection.execute(
+                            'SELECT id, title, status FROM assignment WHERE status = ? ORDER BY id LIMIT 50',
+                            (rng.choice(STATUSES),),
+                        ).fetchall()
+                        counts['reads'] += 1
+                except sqlite3.OperationalError as exc:
+                    if 'locked' not in str(exc):
+                        raise
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+                    counts['locked'] += 1
+            connection.close()
+            with lock:
+                for key, value in counts.items():
+                    totals[key] += value
+                write_times.extend(timings)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        write_times.sort()
+        totals['p99_write_ms'] = write_times[int(len(write_times) * 0.99)] * 1000 if write_times else 0.0
+        return totals
+
+    def _update_status(self, connection, rng, rows):
+        # update_status reads the assignment before saving it, in one transaction
+        assignment_id = rng.randint(1, rows)
+        connection.execute('BEGIN')
+        connection.execute('SELECT status FROM assignment WHERE id = ?', (assignment_id,)).fetchone()
+        connection.execute(
+            'UPDATE assignment SET status = ?, updated_at = ? WHERE id = ?',
+            (rng.choice(STATUSES), time.time(), assignment_id),
+        )
+        connection.execute('COMMIT')
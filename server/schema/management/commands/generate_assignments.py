@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from schema.recurrence import generate_all
+from schema.routers import use_organization
+
+
+class Command(BaseCommand):
+    help = 'Create the upcoming assignments of every active recurring template; safe to run from cron'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization-id', type=int, default=None)
+        parser.add_argument('--ahead-days', type=int, default=None,
+                            help='Defaults to ASSIGNMENT_TEMPLATE_AHEAD_DAYS')
+
+    def handle(self, *args, **options):
+        ahead = timedelta(days=options['ahead_days']) if options['ahead_days'] is not None else None
+        with use_organization(options['organization_id']):
+            created = generate_all(ahead=ahead, organization_id=options['organization_id'])
+        for template_id, count in created.items():
+            self.stdout.write(f'Template {template_id}: {count} assignment(s)')
+        self.stdout.write(self.style.SUCCESS(f'Done, {sum(created.values())} assignment(s) created'))
@@ -0,0 +1,27 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+
+from schema import routers, similarity
+from schema.batching import run_batches
+
+
+class Command(BaseCommand):
+    help = 'Compute MinHash signatures and LSH buckets for submissions that are not indexed yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--reindex', action='store_true', help='Recompute every submission')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        self.indexed = 0
+        for alias in routers.each_shard():
+            batches = similarity.pending_rows(options['batch_size'], options['reindex'])
+            run_batches(similarity.compute, batches, processes, self._store)
+        self.stdout.write(self.style.SUCCESS(f'Done, {self.indexed} submission(s) indexed'))
+
+    def _store(self, entries):
+        self.indexed += similarity.store(entries)
+        self.stdout.write(f'Indexed {self.indexed} submission(s)')
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from schema import routers
+from schema.models import Organization, TenantShard
+
+
+class Command(BaseCommand):
+    help = "Copy an organization's rows to another shard in bulk, then repoint and purge the source"
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization_id', type=int)
+        parser.add_argument('target', help='Database alias listed in SCHEMA_SHARDS')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--keep-source', action='store_true', help='Leave the rows on the source shard')
+        parser.add_argument('--settle-seconds', type=float, default=1.0,
+                            help='Wait after freezing writes so requests already past the check can finish')
+
+    def handle(self, *args, **options):
+        organization_id = options['organization_id']
+        target = options['target']
+        if target not in routers.shards():
+            raise CommandError(f'{target} is not listed in SCHEMA_SHARDS')
+        source = routers.shard_for_organization(organization_id)
+        if source == target:
+            raise CommandError(f'Organization {organization_id} already lives on {target}')
+        if not Organization.objects.using(source).filter(pk=organization_id).exists():
+            raise CommandError(f'Organization {organization_id} not found on {source}')
+
+        # TenantMiddleware rejects the organization's writes until it is repointed
+        self._point(organization_id, source, frozen=True)
+        if options['settle_seconds']:
+            time.sleep(options['settle_seconds'])
+        querysets = routers.tenant_querysets(organization_id, source)
+        try:
+            with transaction.atomic(using=target):
+                for queryset in querysets:
+                    copied = self._copy(queryset, target, options['batch_size'])
+                    self.stdout.write(f'{queryset.model._meta.db_table}: {copied} row(s)')
+                self._reset_sequences(target, [queryset.model for queryset in querysets])
+        except BaseException:
+            self._point(organization_id, source, frozen=False)
+            raise
+        self._point(organization_id, target, frozen=False)
+
+        if not options['keep_source']:
+            with transaction.atomic(using=source):
+                # children first; _raw_delete skips the collector, which would load every row
+                for queryset in reversed(querysets):
+                    queryset.order_by()._raw_delete(source)
+        self.stdout.write(self.style.SUCCESS(f'Moved organization {organization_id} from {source} to {target}'))
+
+    def _point(self, organization_id, alias, frozen):
+        TenantShard.objects.using(routers.DIRECTORY_DB).update_or_create(
+            organization_id=organization_id, defaults={'alias': alias, 'frozen': frozen}
+        )
+        routers.forget_shard(organization_id)
+
+    def _copy(self, queryset, target, batch_size):
+        copied = 0
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(batch[:batch_size])
+            if not rows:
+                return copied
+            queryset.model._base_manager.using(target).bulk_create(rows, batch_size=batch_size)
+            copied += len(rows)
+            last_pk = rows[-1].pk
+
+    def _reset_sequences(self, alias, models):
+        connection = connections[alias]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from schema import deadlines
+
+
+class Command(BaseCommand):
+    help = 'Flag due-soon and overdue assignments, sleeping until the next deadline boundary'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single sweep and exit')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--max-sleep', type=float,
+            default=getattr(settings, 'DEADLINE_SCHEDULER_MAX_SLEEP', 300),
+            help='Upper bound on sleep so newly created deadlines are picked up',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = deadlines.sweep(batch_size=options['batch_size'])
+            if result['overdue'] or result['due_soon']:
+                self.stdout.write(f"Flagged {result['overdue']} overdue, {result['due_soon']} due soon")
+            if options['once']:
+                return
+
+            boundary = deadlines.next_boundary()
+            delay = options['max_sleep']
+            if boundary is not None:
+                delay = min(delay, max(0.0, (boundary - timezone.now()).total_seconds()))
+            # sleep at least a moment so a boundary in the past cannot spin
+            time.sleep(max(delay, 0.5))
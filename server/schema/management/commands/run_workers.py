@@ -0,0 +1,57 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from schema import jobs
+
+
+def _worker_main(index, poll_interval, burst):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+    jobs.work(jobs.worker_name(index), poll_interval, burst, should_stop=lambda: bool(stopping))
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers in a pool of processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        stale = jobs.requeue_stale()
+        if stale['requeued'] or stale['failed']:
+            self.stdout.write(f"Requeued {stale['requeued']} and failed {stale['failed']} stale job(s)")
+
+        if concurrency == 1:
+            processed = jobs.work(jobs.worker_name(), options['poll_interval'], options['burst'])
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
+            return
+
+        # children must not inherit an open database connection
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=_worker_main,
+                args=(index, options['poll_interval'], options['burst']),
+                daemon=False,
+            )
+            for index in range(concurrency)
+        ]
+        for process in workers:
+            process.start()
+        self.stdout.write(f'Started {concurrency} worker process(es)')
+        try:
+            for process in workers:
+                process.join()
+        except KeyboardInterrupt:
+            for process in workers:
+                process.terminate()
+            for process in workers:
+                process.join()
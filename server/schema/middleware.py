@@ -0,0 +1,233 @@
+# middleware.py
+import gzip
+import json
+import re
+import threading
+import zlib
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+from . import routers
+from .audit import audit_log
+from .sqlite import write_lane, write_lane_enabled
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+_accepts_br = re.compile(r'\bbr\b')
+_accepts_gzip = re.compile(r'\bgzip\b')
+# text-like bodies worth compressing; images, archives and other binaries usually are already
+_compressible_type = re.compile(
+    r'^(text/|application/(json|javascript|xml|msgpack|x-msgpack)\b|application/[\w.-]+\+(json|xml)\b)'
+)
+
+
+class CompressionMiddleware:
+    """Brotli or gzip compression for responses above RESPONSE_COMPRESSION_MIN_SIZE.
+
+    Streaming responses are compressed chunk by chunk so they stay streaming.
+    File downloads and responses that are not text-like are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = getattr(settings, 'RESPONSE_COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'RESPONSE_COMPRESSION_BROTLI_QUALITY', 4)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or isinstance(response, FileResponse):
+            return response
+        if not _compressible_type.match(response.get('Content-Type', '').lower()):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and _accepts_br.search(accept_encoding):
+            encoding = 'br'
+        elif _accepts_gzip.search(accept_encoding):
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self._compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = self._compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        return response
+
+    def _compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
+
+    def _compress_stream(self, chunks, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            for chunk in chunks:
+                data = compressor.process(chunk)
+                if data:
+                    yield data
+            yield compressor.finish()
+            return
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class TenantMiddleware:
+    """Bind the request's organization so schema queries route to its shard.
+
+    Writes to an organization that ``move_org`` is copying are rejected with
+    503 until it has been repointed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        organization_id = request.META.get('HTTP_X_ORGANIZATION_ID') or request.GET.get('organization_id')
+        if not organization_id or not str(organization_id).isdigit():
+            return self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and routers.is_frozen(organization_id):
+            response = HttpResponse(
+                json.dumps({'error': 'Organization is being moved, please retry later'}),
+                status=503,
+                content_type='application/json',
+            )
+            response['Retry-After'] = '5'
+            return response
+        with routers.use_organization(int(organization_id)):
+            return self.get_response(request)
+
+
+class AuditFlushMiddleware:
+    """Write buffered assignment transitions before the response goes out"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            audit_log.flush()
+
+
+class WriteLaneMiddleware:
+    """Run requests with unsafe methods one at a time when the database is SQLite"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = write_lane_enabled()
+
+    def __call__(self, request):
+        if not self.enabled or request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return self.get_response(request)
+        with write_lane():
+            return self.get_response(request)
+
+
+class _ReleasingStream:
+    """Streaming body that calls ``release`` once, when iteration ends or the response is closed.
+
+    ``close()`` covers bodies the server never starts iterating, e.g. after
+    the client disconnects; StreamingHttpResponse calls it from its own close.
+    """
+
+    def __init__(self, chunks, release):
+        self.chunks = chunks
+        self.release = release
+        self.released = False
+
+    def __iter__(self):
+        try:
+            yield from self.chunks
+        finally:
+            self.close()
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.release()
+
+
+class AdmissionControlMiddleware:
+    """Bound concurrent requests per worker process.
+
+    Read requests that are not for a single object (lists and list actions)
+    are low priority and are shed with 429 once ``MAX_CONCURRENT_LOW_PRIORITY``
+    requests are in flight, leaving headroom for writes and detail reads up to
+    ``MAX_CONCURRENT``. Streaming responses hold their slot until their body is
+    exhausted or closed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+    def __call__(self, request):
+        config = getattr(settings, 'ADMISSION_CONTROL', {})
+        if not config.get('ENABLED', True):
+            return self.get_response(request)
+        if self._is_low_priority(request):
+            limit = config.get('MAX_CONCURRENT_LOW_PRIORITY', 16)
+        else:
+            limit = config.get('MAX_CONCURRENT', 64)
+
+        with self.lock:
+            if self.in_flight >= limit:
+                return self._busy(config)
+            self.in_flight += 1
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._release()
+            raise
+        if getattr(response, 'streaming', False):
+            # the body is produced after we return; hold the slot until it is exhausted or closed
+            response.streaming_content = _ReleasingStream(response.streaming_content, self._release)
+        else:
+            self._release()
+        return response
+
+    def _release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _is_low_priority(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return 'pk' not in match.kwargs
+
+    def _busy(self, config):
+        response = HttpResponse(
+            json.dumps({'error': 'Server is busy, please retry later'}),
+            status=429,
+            content_type='application/json',
+        )
+        response['Retry-After'] = str(config.get('RETRY_AFTER', 1))
+        return response
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-19 18:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0004_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('DUE_SOON', 'Due Soon'), ('OVERDUE', 'Overdue')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='due_soon_notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='overdue_flagged_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['status', 'end_date'], name='schema_assi_status_3f2ae7_idx'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='assignment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='schema.assignment'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='schema.employee'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('employee', 'assignment', 'kind'), name='unique_notification_per_kind'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2 on 2026-10-19 18:23
+
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+COMPRESS_ABOVE = 1024
+
+
+def copy_submissions(apps, schema_editor):
+    Assignment = apps.get_model('schema', 'Assignment')
+    Submission = apps.get_model('schema', 'Submission')
+    db = schema_editor.connection.alias
+    pending = []
+    rows = Assignment.objects.using(db).exclude(submission_text__isnull=True).values_list('id', 'submission_text')
+    for assignment_id, text in rows.iterator(chunk_size=500):
+        raw = text.encode('utf-8')
+        compressed = zlib.compress(raw, 6) if len(raw) > COMPRESS_ABOVE else raw
+        is_compressed = len(compressed) < len(raw)
+        pending.append(Submission(
+            assignment_id=assignment_id,
+            body=compressed if is_compressed else raw,
+            is_compressed=is_compressed,
+            size=len(raw),
+        ))
+        if len(pending) >= 500:
+            Submission.objects.using(db).bulk_create(pending)
+            pending = []
+    Submission.objects.using(db).bulk_create(pending)
+
+
+def restore_submissions(apps, schema_editor):
+    Assignment = apps.get_model('schema', 'Assignment')
+    Submission = apps.get_model('schema', 'Submission')
+    db = schema_editor.connection.alias
+    for submission in Submission.objects.using(db).iterator(chunk_size=500):
+        body = bytes(submission.body)
+        if submission.is_compressed:
+            body = zlib.decompress(body)
+        Assignment.objects.using(db).filter(id=submission.assignment_id).update(submission_text=body.decode('utf-8'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0005_deadline_sweeper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body', models.BinaryField()),
+                ('is_compressed', models.BooleanField(default=False)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubmissionAttachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('original_name', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='schema.submission')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='assignment',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='submission', to='schema.assignment'),
+        ),
+        migrations.RunPython(copy_submissions, restore_submissions),
+        migrations.RemoveField(
+            model_name='assignment',
+            name='submission_text',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0006_submission_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organization_id', models.BigIntegerField(unique=True)),
+                ('alias', models.CharField(max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-19 18:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0007_tenant_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAssignment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('organization_id', models.BigIntegerField()),
+                ('created_by_id', models.BigIntegerField()),
+                ('assigned_to_ids', models.JSONField(default=list)),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField()),
+                ('status', models.CharField(default='EVALUATED', max_length=20)),
+                ('submission_date', models.DateTimeField(blank=True, null=True)),
+                ('submission_body', models.BinaryField(null=True)),
+                ('submission_is_compressed', models.BooleanField(default=False)),
+                ('attachments', models.JSONField(default=list)),
+                ('score', models.IntegerField(null=True)),
+                ('feedback', models.TextField(blank=True)),
+                ('evaluation_date', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedassignment',
+            index=models.Index(fields=['organization_id', 'archived_at'], name='schema_arch_organiz_9b0e83_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+
+
+def lowercase_emails(apps, schema_editor):
+    Employee = apps.get_model('schema', 'Employee')
+    employees = Employee.objects.using(schema_editor.connection.alias)
+    duplicates = list(
+        employees.values(normalized=Lower(Trim('email')))
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('normalized', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Cannot lowercase employee emails, these addresses differ only in case or whitespace: '
+            f'{", ".join(sorted(duplicates))}. Merge or rename those employees and migrate again.'
+        )
+    employees.update(email=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0009_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0010_lowercase_employee_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
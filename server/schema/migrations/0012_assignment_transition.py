@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 18:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0011_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='schema.employee')),
+                ('assignment', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transitions', to='schema.assignment')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='assignmenttransition',
+            index=models.Index(fields=['assignment', 'created_at'], name='schema_assi_assignm_669916_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 18:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0012_assignment_transition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.BinaryField()),
+                ('shingles', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='signature', to='schema.assignment')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubmissionBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organization_id', models.BigIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='schema.assignment')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='submissionbucket',
+            index=models.Index(fields=['organization_id', 'bucket'], name='schema_subm_organiz_ea4f27_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-19 18:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0013_submission_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentevaluation',
+            name='is_draft',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='Rubric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keywords', models.JSONField(blank=True, default=dict)),
+                ('checks', models.JSONField(blank=True, default=list)),
+                ('min_words', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_words', models.PositiveIntegerField(blank=True, null=True)),
+                ('length_weight', models.PositiveIntegerField(default=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rubric', to='schema.assignment')),
+            ],
+        ),
+    ]
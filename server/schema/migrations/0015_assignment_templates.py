@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-19 18:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0014_rubric_autograding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('recurrence', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly')], default='WEEKLY', max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.DurationField()),
+                ('target', models.CharField(choices=[('ORGANIZATION', 'Everyone in the organization'), ('ROLE', 'Everyone with a role'), ('EMPLOYEES', 'Selected employees')], default='ORGANIZATION', max_length=20)),
+                ('target_role', models.CharField(blank=True, choices=[('ADMIN', 'Admin'), ('INTERN', 'Intern')], max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='period_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assignmenttemplate',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_templates', to='schema.employee'),
+        ),
+        migrations.AddField(
+            model_name='assignmenttemplate',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignment_templates', to='schema.organization'),
+        ),
+        migrations.AddField(
+            model_name='assignmenttemplate',
+            name='target_employees',
+            field=models.ManyToManyField(blank=True, related_name='targeted_templates', to='schema.employee'),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assignments', to='schema.assignmenttemplate'),
+        ),
+        migrations.AddConstraint(
+            model_name='assignment',
+            constraint=models.UniqueConstraint(fields=('template', 'period_start'), name='unique_template_period'),
+        ),
+    ]
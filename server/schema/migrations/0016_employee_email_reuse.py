@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0015_assignment_templates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('email',), name='unique_live_employee_email'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schema', '0016_employee_email_reuse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantshard',
+            name='frozen',
+            field=models.BooleanField(default=False),
+        ),
+    ]
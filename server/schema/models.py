@@ -1,4 +1,7 @@
 # models.py
+import zlib
+
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -12,6 +15,7 @@ class Organization(models.Model):
     contact_phone = models.CharField(max_length=20)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -24,7 +28,8 @@ class Employee(models.Model):
 
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
-    email = models.EmailField(unique=True)
+    # unique among employees that are not soft-deleted, see Meta
+    email = models.EmailField()
     phone = models.CharField(max_length=20)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='employees')
@@ -32,14 +37,62 @@ class Employee(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['email'], condition=models.Q(deleted_at__isnull=True), name='unique_live_employee_email'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.first_name} {self.last_name} ({self.get_role_display()})'
 
+    def save(self, *args, **kwargs):
+        # stored lowercase so case-insensitive lookups can use the unique index
+        if self.email:
+            self.email = self.email.strip().lower()
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == 'ADMIN'
 
+class AssignmentTemplate(models.Model):
+    """Recurring assignment, materialized ahead of time by recurrence.py"""
+    RECURRENCE_CHOICES = [
+        ('DAILY', 'Daily'),
+        ('WEEKLY', 'Weekly'),
+        ('MONTHLY', 'Monthly'),
+    ]
+    TARGET_CHOICES = [
+        ('ORGANIZATION', 'Everyone in the organization'),
+        ('ROLE', 'Everyone with a role'),
+        ('EMPLOYEES', 'Selected employees'),
+    ]
+
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='assignment_templates')
+    created_by = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='created_templates')
+    recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, default='WEEKLY')
+    interval = models.PositiveSmallIntegerField(default=1)
+    # first period starts here; later periods are counted from it so they never drift
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField(null=True, blank=True)
+    # each generated assignment is due this long after its period starts
+    duration = models.DurationField()
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES, default='ORGANIZATION')
+    target_role = models.CharField(max_length=20, choices=Employee.ROLE_CHOICES, blank=True)
+    target_employees = models.ManyToManyField(Employee, blank=True, related_name='targeted_templates')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title
+
 class Assignment(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -56,11 +109,23 @@ class Assignment(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
-    submission_text = models.TextField(null=True, blank=True)
     submission_date = models.DateTimeField(null=True, blank=True)
+    overdue_flagged_at = models.DateTimeField(null=True, blank=True)
+    due_soon_notified_at = models.DateTimeField(null=True, blank=True)
+    template = models.ForeignKey(
+        AssignmentTemplate, null=True, blank=True, on_delete=models.SET_NULL, related_name='assignments'
+    )
+    period_start = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['status', 'end_date'])]
+        constraints = [
+            # one generated assignment per template and period
+            models.UniqueConstraint(fields=['template', 'period_start'], name='unique_template_period'),
+        ]
+
     @property
     def is_overdue(self):
         """Check if the assignment is overdue"""
@@ -80,6 +145,58 @@ class Assignment(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # status as loaded, so saves can log the transition (see signals.py)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    @property
+    def submission_text(self):
+        """Submission body, loaded from its own table on first access"""
+        try:
+            return self.submission.text
+        except Submission.DoesNotExist:
+            return None
+
+    def add_assignees(self, employee_ids):
+        """Assign existing employees in one bulk insert; unknown ids are skipped"""
+        self._insert_assignees(Employee.objects.filter(id__in=set(employee_ids)).values_list('id', flat=True))
+
+    def remove_assignees(self, employee_ids):
+        Assignment.assigned_to.through.objects.filter(
+            assignment_id=self.pk, employee_id__in=set(employee_ids)
+        ).delete()
+        self._forget_assignees()
+
+    def set_assignees(self, employee_ids):
+        """Apply only the difference against the current through rows"""
+        wanted = set(Employee.objects.filter(id__in=set(employee_ids)).values_list('id', flat=True))
+        current = set(Assignment.assigned_to.through.objects.filter(
+            assignment_id=self.pk
+        ).values_list('employee_id', flat=True))
+        if wanted - current:
+            self._insert_assignees(wanted - current)
+        if current - wanted:
+            self.remove_assignees(current - wanted)
+
+    def _insert_assignees(self, employee_ids):
+        through = Assignment.assigned_to.through
+        through.objects.bulk_create(
+            [through(assignment_id=self.pk, employee_id=employee_id) for employee_id in employee_ids],
+            ignore_conflicts=True,
+        )
+        self._forget_assignees()
+
+    def _forget_assignees(self):
+        getattr(self, '_prefetched_objects_cache', {}).pop('assigned_to', None)
+
+    def set_submission(self, text):
+        submission = Submission.store(self, text)
+        self.submission = submission
+        return submission
+
     def clean(self):
         if self.created_by and not self.created_by.is_admin:
             raise ValidationError("Only admin employees can create assignments")
@@ -90,15 +207,97 @@ class Assignment(models.Model):
     def submit(self, submission_text):
         if self.status != 'IN_PROGRESS':
             raise ValidationError("Can only submit assignments that are in progress")
-        self.submission_text = submission_text
+        self.set_submission(submission_text)
         self.submission_date = timezone.now()
         self.status = 'SUBMITTED'
-        self.save()
+        self.save(update_fields=['status', 'submission_date', 'updated_at'])
+
+class Submission(models.Model):
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, related_name='submission')
+    body = models.BinaryField()
+    is_compressed = models.BooleanField(default=False)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Submission for {self.assignment_id}'
+
+    @staticmethod
+    def encode(text):
+        """Field values for a body, zlib-compressed above SUBMISSION_COMPRESS_ABOVE bytes"""
+        raw = (text or '').encode('utf-8')
+        if len(raw) > getattr(settings, 'SUBMISSION_COMPRESS_ABOVE', 1024):
+            compressed = zlib.compress(raw, 6)
+            if len(compressed) < len(raw):
+                return {'body': compressed, 'is_compressed': True, 'size': len(raw)}
+        return {'body': raw, 'is_compressed': False, 'size': len(raw)}
+
+    @classmethod
+    def store(cls, assignment, text):
+        submission, _ = cls.objects.update_or_create(assignment=assignment, defaults=cls.encode(text))
+        return submission
+
+    @property
+    def text(self):
+        body = bytes(self.body)
+        if self.is_compressed:
+            body = zlib.decompress(body)
+        return body.decode('utf-8')
+
+class SubmissionAttachment(models.Model):
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='attachments')
+    file = models.FileField(max_length=255)
+    original_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.original_name
+
+class SubmissionSignature(models.Model):
+    """MinHash signature of a submission's text, see similarity.py"""
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, related_name='signature')
+    signature = models.BinaryField()
+    shingles = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'Signature for {self.assignment_id}'
+
+class SubmissionBucket(models.Model):
+    """LSH band of a signature; submissions sharing a bucket are near-duplicate candidates"""
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='+')
+    organization_id = models.BigIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['organization_id', 'bucket'])]
+
+class Rubric(models.Model):
+    """Auto-grading rules for an assignment's submission, see grading.py"""
+    assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, related_name='rubric')
+    # {"keyword": weight, ...}, matched as whole words, case-insensitive
+    keywords = models.JSONField(default=dict, blank=True)
+    # [{"pattern": "...", "weight": n, "label": "..."}, ...]
+    checks = models.JSONField(default=list, blank=True)
+    min_words = models.PositiveIntegerField(null=True, blank=True)
+    max_words = models.PositiveIntegerField(null=True, blank=True)
+    length_weight = models.PositiveIntegerField(default=10)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Rubric for {self.assignment_id}'
 
 class AssignmentEvaluation(models.Model):
     assignment = models.OneToOneField(Assignment, on_delete=models.CASCADE, related_name='evaluation')
     score = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(100)])
     feedback = models.TextField()
+    # auto-graded and waiting for an admin to confirm; the assignment stays SUBMITTED
+    is_draft = models.BooleanField(default=False)
     evaluation_date = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -118,6 +317,165 @@ class AssignmentEvaluation(models.Model):
         
     def save(self, *args, **kwargs):
         self.clean()
+        self.is_draft = False
         super().save(*args, **kwargs)
         self.assignment.status = 'EVALUATED'
-        self.assignment.save()
\ No newline at end of file
+        self.assignment.audit_actor_id = self.assignment.created_by_id
+        self.assignment.save()
+
+class AssignmentTransition(models.Model):
+    """Append-only log of assignment status changes, written in batches by audit.py.
+
+    No database constraints, so the log outlives archived and purged rows.
+    """
+    assignment = models.ForeignKey(
+        Assignment, on_delete=models.DO_NOTHING, db_constraint=False, related_name='transitions'
+    )
+    actor = models.ForeignKey(
+        Employee, null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['assignment', 'created_at'])]
+
+    def __str__(self):
+        return f'{self.assignment_id}: {self.from_status or "-"} -> {self.to_status}'
+
+class ArchivedAssignment(models.Model):
+    """Evaluated assignment, with its evaluation and submission, moved out of the hot tables"""
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    organization_id = models.BigIntegerField()
+    created_by_id = models.BigIntegerField()
+    assigned_to_ids = models.JSONField(default=list)
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField()
+    status = models.CharField(max_length=20, default='EVALUATED')
+    submission_date = models.DateTimeField(null=True, blank=True)
+    submission_body = models.BinaryField(null=True)
+    submission_is_compressed = models.BooleanField(default=False)
+    attachments = models.JSONField(default=list)
+    score = models.IntegerField(null=True)
+    feedback = models.TextField(blank=True)
+    evaluation_date = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['organization_id', 'archived_at'])]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def submission_text(self):
+        if self.submission_body is None:
+            return None
+        body = bytes(self.submission_body)
+        if self.submission_is_compressed:
+            body = zlib.decompress(body)
+        return body.decode('utf-8')
+
+class Notification(models.Model):
+    KIND_CHOICES = [
+        ('DUE_SOON', 'Due Soon'),
+        ('OVERDUE', 'Overdue'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='notifications')
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'assignment', 'kind'], name='unique_notification_per_kind')
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.assignment} for {self.employee}'
+
+class TenantShard(models.Model):
+    """Directory row mapping an organization to its shard database alias"""
+    organization_id = models.BigIntegerField(unique=True)
+    alias = models.CharField(max_length=100)
+    frozen = models.BooleanField(default=False)  # writes are rejected while move_org runs
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Organization {self.organization_id} -> {self.alias}'
+
+class IdempotencyRecord(models.Model):
+    """First response to a request sent with an Idempotency-Key header"""
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.BinaryField(null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'scope'], name='unique_idempotency_key_per_scope')
+        ]
+
+    def __str__(self):
+        return f'{self.scope} [{self.key}]'
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    worker = models.CharField(max_length=100, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.get_status_display()})'
+
+    @property
+    def percent(self):
+        if self.status == 'SUCCEEDED':
+            return 100
+        if not self.total:
+            return None
+        return min(100, round(self.progress * 100 / self.total, 1))
+
+    def report_progress(self, progress, total=None):
+        """Persist progress without touching the rest of the row"""
+        self.progress = progress
+        fields = {'progress': progress, 'updated_at': timezone.now()}
+        if total is not None:
+            self.total = total
+            fields['total'] = total
+        Job.objects.filter(pk=self.pk).update(**fields)
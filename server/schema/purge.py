@@ -0,0 +1,98 @@
+# purge.py
+"""Batched bottom-up deletion of organizations and employees.
+
+Django's cascade collector loads every dependent row before deleting.
+Here each table is emptied child-first with
+``DELETE ... WHERE id IN (SELECT id ... LIMIT n)`` in short transactions,
+so memory stays flat and locks are held briefly.
+"""
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .models import (
+    ArchivedAssignment, Assignment, AssignmentEvaluation, AssignmentTemplate, AssignmentTransition, Employee,
+    Notification, Organization, Rubric, Submission, SubmissionAttachment, SubmissionBucket, SubmissionSignature
+)
+from .resolvers import email_resolver
+
+
+def batched_delete(queryset, batch_size=1000):
+    db = queryset.db
+    connection = connections[db]
+    model = queryset.model
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    batch_sql, params = queryset.order_by().values('pk')[:batch_size].query.get_compiler(db).as_sql()
+    # the derived table keeps MySQL happy about LIMIT in IN and self-referencing deletes
+    sql = f'DELETE FROM {table} WHERE {pk} IN (SELECT * FROM ({batch_sql}) AS batch)'
+
+    deleted = 0
+    while True:
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            count = cursor.rowcount
+        if count <= 0:
+            return deleted
+        deleted += count
+
+
+def _assignment_plan(assignments, employees):
+    through = Assignment.assigned_to.through
+    return [
+        Notification.objects.filter(Q(assignment_id__in=assignments) | Q(employee_id__in=employees)),
+        AssignmentTransition.objects.filter(assignment_id__in=assignments),
+        SubmissionBucket.objects.filter(assignment_id__in=assignments),
+        Rubric.objects.filter(assignment_id__in=assignments),
+        SubmissionSignature.objects.filter(assignment_id__in=assignments),
+        SubmissionAttachment.objects.filter(submission__assignment_id__in=assignments),
+        Submission.objects.filter(assignment_id__in=assignments),
+        AssignmentEvaluation.objects.filter(assignment_id__in=assignments),
+        through.objects.filter(Q(assignment_id__in=assignments) | Q(employee_id__in=employees)),
+        Assignment.objects.filter(pk__in=assignments),
+    ]
+
+
+def _template_plan(templates, employees):
+    # after the assignments generated from them, before their creators
+    through = AssignmentTemplate.target_employees.through
+    return [
+        through.objects.filter(Q(assignmenttemplate_id__in=templates) | Q(employee_id__in=employees)),
+        AssignmentTemplate.objects.filter(pk__in=templates),
+    ]
+
+
+def organization_plan(organization_id):
+    employees = Employee.objects.filter(organization_id=organization_id).values('pk')
+    assignments = Assignment.objects.filter(
+        Q(organization_id=organization_id) | Q(created_by__organization_id=organization_id)
+    ).values('pk')
+    templates = AssignmentTemplate.objects.filter(
+        Q(organization_id=organization_id) | Q(created_by__organization_id=organization_id)
+    ).values('pk')
+    archived = ArchivedAssignment.objects.filter(organization_id=organization_id)
+    return _assignment_plan(assignments, employees) + _template_plan(templates, employees) + [
+        AssignmentTransition.objects.filter(assignment_id__in=archived.values('pk')),
+        ArchivedAssignment.objects.filter(organization_id=organization_id),
+        Employee.objects.filter(organization_id=organization_id),
+        Organization.objects.filter(pk=organization_id),
+    ]
+
+
+def employee_plan(employee_id):
+    employees = Employee.objects.filter(pk=employee_id).values('pk')
+    assignments = Assignment.objects.filter(created_by_id=employee_id).values('pk')
+    templates = AssignmentTemplate.objects.filter(created_by_id=employee_id).values('pk')
+    return _assignment_plan(assignments, employees) + _template_plan(templates, employees) + [
+        Employee.objects.filter(pk=employee_id)
+    ]
+
+
+def purge(plan, batch_size=1000, progress=None):
+    deleted = {}
+    for step, queryset in enumerate(plan, start=1):
+        deleted[queryset.model._meta.db_table] = batched_delete(queryset, batch_size)
+        if progress:
+            progress(step, len(plan))
+    # raw deletes bypass the signals that keep the resolver fresh
+    email_resolver.clear()
+    return deleted
@@ -0,0 +1,146 @@
+# recurrence.py
+"""Materialize upcoming assignments from recurring templates.
+
+Every period whose window has not ended and that starts within
+``ASSIGNMENT_TEMPLATE_AHEAD_DAYS`` gets one assignment. Assignments,
+``assigned_to`` rows and creation transitions are bulk-inserted. Generators
+for the same template are serialized by a no-op ``UPDATE`` of the template
+row as the first statement of the transaction: it takes the row lock where
+the backend has row locks and SQLite's database write lock otherwise
+(``select_for_update`` is ignored on SQLite, and a transaction that reads
+before it writes cannot wait for that lock). The ``(template, period_start)``
+unique constraint backs this up, so reruns and concurrent runs are no-ops
+for periods that already exist.
+"""
+import calendar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import routers
+from .models import Assignment, AssignmentTemplate, AssignmentTransition, Employee
+
+THROUGH_BATCH_SIZE = 2000
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def period_start(template, index):
+    """Start of the template's ``index``-th period, counted from ``starts_at``"""
+    if template.recurrence == 'MONTHLY':
+        return _add_months(template.starts_at, index * template.interval)
+    days = 7 if template.recurrence == 'WEEKLY' else 1
+    return template.starts_at + timedelta(days=days * template.interval * index)
+
+
+def upcoming_periods(template, now=None, ahead=None):
+    """Period starts that have not ended yet and begin before ``now + ahead``"""
+    now = now or timezone.now()
+    if ahead is None:
+        ahead = timedelta(days=getattr(settings, 'ASSIGNMENT_TEMPLATE_AHEAD_DAYS', 14))
+    horizon = now + ahead
+    if template.ends_at:
+        horizon = min(horizon, template.ends_at)
+
+    index = 0
+    if template.recurrence != 'MONTHLY':
+        # jump straight to the first period still open instead of walking from starts_at
+        step = period_start(template, 1) - template.starts_at
+        index = max(0, (now - template.duration - template.starts_at) // step)
+    periods = []
+    while True:
+        start = period_start(template, index)
+        if start >= horizon:
+            return periods
+        if start + template.duration > now:
+            periods.append(start)
+        index += 1
+
+
+def target_employee_ids(template):
+    employees = Employee.objects.filter(
+        organization_id=template.organization_id, is_active=True, deleted_at__isnull=True
+    )
+    if template.target == 'ROLE':
+        employees = employees.filter(role=template.target_role)
+    elif template.target == 'EMPLOYEES':
+        employees = employees.filter(targeted_templates=template)
+    return list(employees.order_by('id').values_list('id', flat=True))
+
+
+def generate(template, now=None, ahead=None):
+    """Create the template's missing upcoming assignments; returns how many were created"""
+    periods = upcoming_periods(template, now, ahead)
+    if not periods:
+        return 0
+
+    through = Assignment.assigned_to.through
+    with transaction.atomic(using=router.db_for_write(AssignmentTemplate, instance=template)):
+        # concurrent generators for this template queue here, so the periods
+        # missing below are exactly the ones this run inserts
+        AssignmentTemplate.objects.filter(pk=template.pk).update(is_active=F('is_active'))
+        existing = set(template.assignments.filter(period_start__in=periods).values_list('period_start', flat=True))
+        missing = [start for start in periods if start not in existing]
+        if not missing:
+            return 0
+        employee_ids = target_employee_ids(template)
+        Assignment.objects.bulk_create([
+            Assignment(
+                title=template.title,
+                description=template.description,
+                organization_id=template.organization_id,
+                created_by_id=template.created_by_id,
+                start_date=start,
+                end_date=start + template.duration,
+                template=template,
+                period_start=start,
+            )
+            for start in missing
+        ], ignore_conflicts=True)
+        # ignore_conflicts leaves pks unset, so read them back
+        created = list(template.assignments.filter(period_start__in=missing).values_list('id', flat=True))
+        now = timezone.now()
+        # bulk_create skips the post_save receiver that logs transitions
+        AssignmentTransition.objects.bulk_create([
+            AssignmentTransition(assignment_id=assignment_id, to_status='PENDING', created_at=now)
+            for assignment_id in created
+        ])
+        batch = []
+        for assignment_id in created:
+            for employee_id in employee_ids:
+                batch.append(through(assignment_id=assignment_id, employee_id=employee_id))
+                if len(batch) >= THROUGH_BATCH_SIZE:
+                    through.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+        through.objects.bulk_create(batch, ignore_conflicts=True)
+    return len(created)
+
+
+def generate_all(now=None, ahead=None, organization_id=None):
+    """Generate for every active template, or one organization's, across shards"""
+    created = {}
+    if organization_id:
+        with routers.use_organization(organization_id):
+            _generate_templates(
+                AssignmentTemplate.objects.filter(is_active=True, organization_id=organization_id), now, ahead, created
+            )
+        return created
+    for alias in routers.each_shard():
+        _generate_templates(AssignmentTemplate.objects.filter(is_active=True), now, ahead, created)
+    return created
+
+
+def _generate_templates(templates, now, ahead, created):
+    for template in templates.iterator():
+        count = generate(template, now, ahead)
+        if count:
+            created[template.pk] = count
@@ -0,0 +1,77 @@
+# resolvers.py
+"""In-process email -> employee id resolution with an LRU cache.
+
+Soft-deleted employees, and employees of soft-deleted organizations, do not
+resolve. Entries are dropped by the Employee save/delete signals (see
+signals.py). Bulk updates and raw deletes bypass signals and should call
+``clear()``; signals only reach this process, so entries also expire after
+``EMPLOYEE_EMAIL_CACHE_SECONDS`` to bound staleness in the others.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+
+from .models import Employee
+
+
+class EmailResolver:
+    def __init__(self, maxsize=4096, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, email):
+        email = email.strip().lower()
+        key = (router.db_for_read(Employee) or 'default', email)
+        with self._lock:
+            if key in self._entries:
+                employee_id, expires_at = self._entries[key]
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return employee_id
+                del self._entries[key]
+
+        employee_id = Employee.objects.filter(
+            email=email, deleted_at__isnull=True, organization__deleted_at__isnull=True
+        ).values_list('id', flat=True).first()
+        if employee_id is not None:
+            with self._lock:
+                self._entries[key] = (employee_id, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return employee_id
+
+    def invalidate(self, employee_id):
+        with self._lock:
+            stale = [key for key, (value, _) in self._entries.items() if value == employee_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+email_resolver = EmailResolver(
+    getattr(settings, 'EMPLOYEE_EMAIL_CACHE_SIZE', 4096), getattr(settings, 'EMPLOYEE_EMAIL_CACHE_SECONDS', 60)
+)
+
+
+def resolve_employee_id(value):
+    """Employee id for a numeric id or an email address, None if it cannot be resolved"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    if '@' in value:
+        return email_resolver.resolve(value)
+    return None
@@ -0,0 +1,227 @@
+# routers.py
+"""Per-organization database sharding.
+
+Every organization's rows (employees, assignments, evaluations, ...) live on
+one shard alias from ``SCHEMA_SHARDS``. The mapping is kept in ``TenantShard``
+on the directory database together with other global tables. Queries are
+routed by the instance they concern or by the organization bound to the
+current request (``X-Organization-ID`` header or ``organization_id`` query
+parameter, see ``TenantMiddleware``) or, for jobs that sweep every tenant,
+by the shard bound with ``use_shard()``/``each_shard()``; anything else goes
+to ``default``.
+
+Directory lookups are cached in the ``SCHEMA_SHARD_CACHE`` cache alias,
+which must be shared by every process so that ``forget_shard`` after a move
+reaches all of them. While ``move_org`` copies an organization its directory
+row is ``frozen`` and ``TenantMiddleware`` rejects writes for it.
+
+Primary keys must not collide across shards, so give each shard a disjoint
+id range (e.g. sequence offsets) before creating rows on it.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DIRECTORY_DB = DEFAULT_DB_ALIAS
+GLOBAL_MODELS = {'tenantshard', 'job', 'idempotencyrecord'}
+SHARD_CACHE_SECONDS = 60
+
+_current_organization = ContextVar('current_organization', default=None)
+_current_shard = ContextVar('current_shard', default=None)
+
+
+def shards():
+    return list(getattr(settings, 'SCHEMA_SHARDS', [DEFAULT_DB_ALIAS]))
+
+
+def is_sharded():
+    return len(shards()) > 1
+
+
+def current_organization():
+    return _current_organization.get()
+
+
+@contextmanager
+def use_organization(organization_id):
+    token = _current_organization.set(organization_id)
+    try:
+        yield
+    finally:
+        _current_organization.reset(token)
+
+
+def current_shard():
+    return _current_shard.get()
+
+
+@contextmanager
+def use_shard(alias):
+    token = _current_shard.set(alias)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+def each_shard():
+    """Yield every shard alias with queries not tied to an organization routed to it"""
+    for alias in shards():
+        with use_shard(alias):
+            yield alias
+
+
+def _shard_cache():
+    return caches[getattr(settings, 'SCHEMA_SHARD_CACHE', 'default')]
+
+
+def _cache_key(organization_id):
+    return f'tenant-shard:{int(organization_id)}'
+
+
+def shard_for_organization(organization_id):
+    if not is_sharded():
+        return shards()[0]
+    cache = _shard_cache()
+    alias = cache.get(_cache_key(organization_id))
+    if alias:
+        return alias
+
+    from .models import TenantShard
+
+    alias = TenantShard.objects.using(DIRECTORY_DB).filter(
+        organization_id=int(organization_id)
+    ).values_list('alias', flat=True).first() or DEFAULT_DB_ALIAS
+    cache.set(_cache_key(organization_id), alias, timeout=SHARD_CACHE_SECONDS)
+    return alias
+
+
+def forget_shard(organization_id):
+    _shard_cache().delete(_cache_key(organization_id))
+
+
+def is_frozen(organization_id):
+    """Whether the organization is being moved and must not be written to"""
+    if not is_sharded():
+        return False
+
+    from .models import TenantShard
+
+    return TenantShard.objects.using(DIRECTORY_DB).filter(
+        organization_id=int(organization_id), frozen=True
+    ).exists()
+
+
+def organization_of(instance):
+    """Organization id an instance belongs to, following cached relations only"""
+    if instance._meta.model_name == 'organization':
+        return instance.pk
+    organization_id = getattr(instance, 'organization_id', None)
+    if organization_id is not None:
+        return organization_id
+    for related in instance._state.fields_cache.values():
+        if related is not None and hasattr(related, '_state'):
+            organization_id = organization_of(related)
+            if organization_id is not None:
+                return organization_id
+    return None
+
+
+def tenant_querysets(organization_id, using):
+    """Querysets covering one organization's rows, parents before children"""
+    from .models import (
+        ArchivedAssignment, Assignment, AssignmentEvaluation, AssignmentTemplate, AssignmentTransition, Employee,
+        Notification, Organization, Rubric, Submission, SubmissionAttachment, SubmissionBucket, SubmissionSignature
+    )
+
+    lookups = [
+        (Organization, 'id'),
+        (Employee, 'organization_id'),
+        (AssignmentTemplate, 'organization_id'),
+        (AssignmentTemplate.target_employees.through, 'assignmenttemplate__organization_id'),
+        (Assignment, 'organization_id'),
+        (Assignment.assigned_to.through, 'assignment__organization_id'),
+        (AssignmentEvaluation, 'assignment__organization_id'),
+        (Submission, 'assignment__organization_id'),
+        (SubmissionAttachment, 'submission__assignment__organization_id'),
+        (SubmissionSignature, 'assignment__organization_id'),
+        (SubmissionBucket, 'organization_id'),
+        (Rubric, 'assignment__organization_id'),
+        (Notification, 'assignment__organization_id'),
+        (ArchivedAssignment, 'organization_id'),
+    ]
+    # the transition log has no FK constraints and outlives archived assignments
+    assignment_ids = [
+        Assignment.objects.using(using).filter(organization_id=organization_id).values('pk'),
+        ArchivedAssignment.objects.using(using).filter(organization_id=organization_id).values('pk'),
+    ]
+    return [
+        model._base_manager.using(using).filter(**{lookup: organization_id}).order_by('pk')
+        for model, lookup in lookups
+    ] + [
+        AssignmentTransition.objects.using(using).filter(assignment_id__in=ids).order_by('pk')
+        for ids in assignment_ids
+    ]
+
+
+def fan_out(func, aliases=None):
+    """Call ``func(alias)`` on every shard in parallel and concatenate the results"""
+    aliases = aliases or shards()
+
+    def run(alias):
+        try:
+            return list(func(alias))
+        finally:
+            connections[alias].close()
+
+    if len(aliases) == 1:
+        return list(func(aliases[0]))
+    with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+        results = executor.map(run, aliases)
+    return [row for rows in results for row in rows]
+
+
+class TenantRouter:
+    def _route(self, model, hints):
+        if model._meta.app_label != 'schema':
+            return None
+        if model._meta.model_name in GLOBAL_MODELS:
+            return DIRECTORY_DB
+        if not is_sharded():
+            return None
+
+        instance = hints.get('instance')
+        if instance is not None:
+            if instance._state.db:
+                return instance._state.db
+            organization_id = organization_of(instance)
+            if organization_id is not None:
+                return shard_for_organization(organization_id)
+
+        organization_id = current_organization()
+        if organization_id is not None:
+            return shard_for_organization(organization_id)
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._meta.app_label == 'schema' and obj2._meta.app_label == 'schema':
+            if obj1._state.db and obj2._state.db:
+                return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label != 'schema':
+            return None
+        if model_name in GLOBAL_MODELS:
+            return db == DIRECTORY_DB
+        return db in shards()
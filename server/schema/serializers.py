@@ -1,6 +1,13 @@
 # serializers.py
+import re
+
 from rest_framework import serializers
-from .models import Organization, Employee, Assignment, AssignmentEvaluation
+from .models import (
+    ArchivedAssignment, Organization, Employee, Assignment, AssignmentEvaluation, AssignmentTemplate,
+    AssignmentTransition, Job, Notification, Rubric, Submission, SubmissionAttachment
+)
+from . import jobs
+from .grading import compile_rubric
 from datetime import datetime, timedelta
 
 class OrganizationSerializer(serializers.ModelSerializer):
@@ -17,6 +24,18 @@ class EmployeeSerializer(serializers.ModelSerializer):
         fields = ['id', 'first_name', 'last_name', 'email', 'phone', 'role', 'organization', 
                   'organization_name', 'joining_date', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        extra_kwargs = {'email': {'validators': []}}
+
+    def validate_email(self, value):
+        # compare the way Employee.save() stores it, not case-sensitively
+        value = value.strip().lower()
+        # soft-deleted employees keep their row until purged but free the address
+        employees = Employee.objects.filter(email__iexact=value, deleted_at__isnull=True)
+        if self.instance is not None:
+            employees = employees.exclude(pk=self.instance.pk)
+        if employees.exists():
+            raise serializers.ValidationError("An employee with this email already exists")
+        return value
 
 class EmployeeListSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
@@ -38,6 +57,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
         required=True
     )
     created_by_id = serializers.IntegerField(write_only=True, required=True)
+    submission_text = serializers.CharField(required=False, allow_null=True, allow_blank=True)
     is_overdue = serializers.BooleanField(read_only=True)
     time_remaining = serializers.DurationField(read_only=True)
     
@@ -48,6 +68,13 @@ class AssignmentSerializer(serializers.ModelSerializer):
                   'end_date', 'status', 'submission_text', 'submission_date', 'created_at', 
                   'updated_at', 'is_overdue', 'time_remaining']
         read_only_fields = ['created_at', 'updated_at', 'submission_date']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Submission bodies live in their own table; only detail views load them
+        if not self.context.get('include_submission'):
+            fields['submission_text'].write_only = True
+        return fields
     
     def validate(self, data):
         if self.instance is None:  # Creating new assignment
@@ -76,6 +103,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         employee_ids = validated_data.pop('employee_ids')
         created_by_id = validated_data.pop('created_by_id')
+        submission_text = validated_data.pop('submission_text', None)
         
         # Get the creator employee
         try:
@@ -89,47 +117,75 @@ class AssignmentSerializer(serializers.ModelSerializer):
             **validated_data
         )
         
-        # Add assigned employees
-        for employee_id in employee_ids:
-            try:
-                employee = Employee.objects.get(id=employee_id)
-                assignment.assigned_to.add(employee)
-            except Employee.DoesNotExist:
-                # Skip invalid employee ids
-                pass
+        # Add assigned employees, skipping invalid ids
+        assignment.add_assignees(employee_ids)
+
+        if submission_text is not None:
+            assignment.set_submission(submission_text)
         
         return assignment
     
     def update(self, instance, validated_data):
         if 'employee_ids' in validated_data:
-            employee_ids = validated_data.pop('employee_ids')
-            instance.assigned_to.clear()
-            
-            for employee_id in employee_ids:
-                try:
-                    employee = Employee.objects.get(id=employee_id)
-                    instance.assigned_to.add(employee)
-                except Employee.DoesNotExist:
-                    # Skip invalid employee ids
-                    pass
+            # Only touch the through rows that actually change
+            instance.set_assignees(validated_data.pop('employee_ids'))
         
+        # A moved deadline has to be swept again
+        if validated_data.get('end_date') and validated_data['end_date'] != instance.end_date:
+            instance.overdue_flagged_at = None
+            instance.due_soon_notified_at = None
+
+        if validated_data.get('submission_text') is not None:
+            instance.set_submission(validated_data['submission_text'])
+        validated_data.pop('submission_text', None)
+
         # Remove write-only fields
         if 'created_by_id' in validated_data:
             validated_data.pop('created_by_id')
         
         return super().update(instance, validated_data)
 
+class AssigneeChangeSerializer(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, data):
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError("Provide employee ids to add or remove")
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError("An employee cannot be both added and removed")
+        return data
+
 class AssignmentSubmissionSerializer(serializers.Serializer):
     submission_text = serializers.CharField(required=True)
 
+class SubmissionAttachmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubmissionAttachment
+        fields = ['id', 'original_name', 'content_type', 'size', 'sha256', 'created_at']
+        read_only_fields = fields
+
+class SubmissionSerializer(serializers.ModelSerializer):
+    text = serializers.CharField(read_only=True)
+    submission_date = serializers.DateTimeField(source='assignment.submission_date', read_only=True)
+    attachments = SubmissionAttachmentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Submission
+        fields = ['id', 'assignment', 'text', 'size', 'is_compressed', 'submission_date',
+                  'attachments', 'created_at', 'updated_at']
+        read_only_fields = fields
+
 class AssignmentEvaluationSerializer(serializers.ModelSerializer):
     assignment_title = serializers.CharField(source='assignment.title', read_only=True)
     
     class Meta:
         model = AssignmentEvaluation
-        fields = ['id', 'assignment', 'assignment_title', 'score', 'feedback',
+        fields = ['id', 'assignment', 'assignment_title', 'score', 'feedback', 'is_draft',
                   'evaluation_date', 'created_at', 'updated_at']
-        read_only_fields = ['evaluation_date', 'created_at', 'updated_at']
+        read_only_fields = ['is_draft', 'evaluation_date', 'created_at', 'updated_at']
+        # an auto-graded draft may exist; create() replaces it
+        extra_kwargs = {'assignment': {'validators': []}}
     
     def validate(self, data):
         assignment = data.get('assignment')
@@ -143,4 +199,187 @@ class AssignmentEvaluationSerializer(serializers.ModelSerializer):
         if data.get('score', 0) < 0 or data.get('score', 0) > 100:
             raise serializers.ValidationError("Score must be between 0 and 100")
         
-        return data
\ No newline at end of file
+        return data
+
+    def create(self, validated_data):
+        AssignmentEvaluation.objects.filter(assignment=validated_data['assignment'], is_draft=True).delete()
+        return super().create(validated_data)
+
+
+class AssignmentTemplateSerializer(serializers.ModelSerializer):
+    target_employees = serializers.PrimaryKeyRelatedField(
+        many=True, required=False, queryset=Employee.objects.all()
+    )
+
+    class Meta:
+        model = AssignmentTemplate
+        fields = ['id', 'title', 'description', 'organization', 'created_by', 'recurrence', 'interval',
+                  'starts_at', 'ends_at', 'duration', 'target', 'target_role', 'target_employees',
+                  'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate(self, data):
+        def value(field):
+            return data.get(field, getattr(self.instance, field, None))
+
+        organization, created_by = value('organization'), value('created_by')
+        if not created_by.is_admin or created_by.organization_id != organization.id:
+            raise serializers.ValidationError("Templates must be created by an admin of the organization")
+        if value('interval') is not None and value('interval') < 1:
+            raise serializers.ValidationError("interval must be at least 1")
+        if value('duration') is not None and value('duration').total_seconds() <= 0:
+            raise serializers.ValidationError("duration must be positive")
+        if value('ends_at') and value('ends_at') <= value('starts_at'):
+            raise serializers.ValidationError("ends_at must be after starts_at")
+
+        target = value('target') or 'ORGANIZATION'
+        if target == 'ROLE' and not value('target_role'):
+            raise serializers.ValidationError("target_role is required for role targets")
+        if target == 'EMPLOYEES':
+            employees = data.get('target_employees')
+            if employees is None and self.instance is not None:
+                employees = list(self.instance.target_employees.all())
+            if not employees:
+                raise serializers.ValidationError("target_employees is required for employee targets")
+            if any(employee.organization_id != organization.id for employee in employees):
+                raise serializers.ValidationError("All target employees must belong to the organization")
+        return data
+
+
+class RubricSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Rubric
+        fields = ['id', 'assignment', 'keywords', 'checks', 'min_words', 'max_words', 'length_weight',
+                  'created_at', 'updated_at']
+        read_only_fields = ['assignment', 'created_at', 'updated_at']
+
+    @staticmethod
+    def _is_weight(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+
+    def validate_keywords(self, value):
+        if not isinstance(value, dict) or not all(self._is_weight(weight) for weight in value.values()):
+            raise serializers.ValidationError("keywords must map each keyword to a non-negative weight")
+        return value
+
+    def validate_checks(self, value):
+        if not isinstance(value, list) or not all(isinstance(check, dict) and check.get('pattern') for check in value):
+            raise serializers.ValidationError("checks must be a list of objects with a pattern")
+        if not all(self._is_weight(check.get('weight', 1)) for check in value):
+            raise serializers.ValidationError("check weights must be non-negative numbers")
+        return value
+
+    def validate(self, data):
+        try:
+            compiled = compile_rubric({
+                'keywords': data.get('keywords'), 'checks': data.get('checks'),
+                'min_words': data.get('min_words'), 'max_words': data.get('max_words'),
+                'length_weight': data.get('length_weight', 10),
+            })
+        except re.error as e:
+            raise serializers.ValidationError(f"Invalid check pattern: {e}")
+        if compiled.possible <= 0:
+            raise serializers.ValidationError("Rubric must have a positive total weight")
+        if data.get('min_words') and data.get('max_words') and data['min_words'] > data['max_words']:
+            raise serializers.ValidationError("min_words must not exceed max_words")
+        return data
+
+class EmployeeProfileSerializer(serializers.Serializer):
+    employee = EmployeeSerializer(read_only=True)
+    organization = OrganizationSerializer(read_only=True)
+    assigned_assignments = AssignmentSerializer(many=True, read_only=True)
+    created_assignments = AssignmentSerializer(many=True, read_only=True)
+    evaluations = serializers.SerializerMethodField()
+    stats = serializers.SerializerMethodField()
+
+    def _evaluations(self, obj):
+        # evaluations are joined onto the assignments already loaded
+        evaluations = []
+        for assignment in obj['assigned_assignments']:
+            try:
+                evaluation = assignment.evaluation
+            except AssignmentEvaluation.DoesNotExist:
+                continue
+            if not evaluation.is_draft:
+                evaluations.append(evaluation)
+        return evaluations
+
+    def get_evaluations(self, obj):
+        return AssignmentEvaluationSerializer(self._evaluations(obj), many=True, context=self.context).data
+
+    def get_stats(self, obj):
+        assigned = obj['assigned_assignments']
+        by_status = {key: 0 for key, _ in Assignment.STATUS_CHOICES}
+        for assignment in assigned:
+            by_status[assignment.status] += 1
+        scores = [evaluation.score for evaluation in self._evaluations(obj)]
+        return {
+            'total_assigned': len(assigned),
+            'total_created': len(obj['created_assignments']),
+            'by_status': by_status,
+            'overdue': sum(1 for assignment in assigned if assignment.is_overdue),
+            'evaluated': len(scores),
+            'average_score': round(sum(scores) / len(scores), 2) if scores else None,
+        }
+
+
+class JobSerializer(serializers.ModelSerializer):
+    percent = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'payload', 'status', 'progress', 'total', 'percent', 'result',
+                  'error', 'attempts', 'max_attempts', 'run_after', 'started_at', 'finished_at',
+                  'created_at', 'updated_at']
+        read_only_fields = ['status', 'progress', 'total', 'result', 'error', 'attempts',
+                            'started_at', 'finished_at', 'created_at', 'updated_at']
+
+    def validate_kind(self, value):
+        if value not in jobs.public_tasks():
+            raise serializers.ValidationError(f"Unknown job kind. Must be one of {jobs.public_tasks()}")
+        return value
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    assignment_title = serializers.CharField(source='assignment.title', read_only=True)
+    end_date = serializers.DateTimeField(source='assignment.end_date', read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'employee', 'assignment', 'assignment_title', 'end_date', 'kind', 'created_at', 'read_at']
+        read_only_fields = fields
+
+
+class SimilarSubmissionSerializer(serializers.Serializer):
+    assignment = serializers.IntegerField(source='assignment.id')
+    title = serializers.CharField(source='assignment.title')
+    status = serializers.CharField(source='assignment.status')
+    assigned_to = EmployeeListSerializer(source='assignment.assigned_to', many=True)
+    similarity = serializers.FloatField()
+
+
+class AssignmentTransitionSerializer(serializers.ModelSerializer):
+    actor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AssignmentTransition
+        fields = ['id', 'assignment', 'from_status', 'to_status', 'actor', 'actor_name', 'created_at']
+        read_only_fields = fields
+
+    def get_actor_name(self, obj):
+        # the actor may since have been purged; the log keeps the id regardless
+        if obj.actor is None:
+            return None
+        return f'{obj.actor.first_name} {obj.actor.last_name}'
+
+
+class ArchivedAssignmentSerializer(serializers.ModelSerializer):
+    organization = serializers.IntegerField(source='organization_id', read_only=True)
+    archived = serializers.BooleanField(default=True, read_only=True)
+
+    class Meta:
+        model = ArchivedAssignment
+        fields = ['id', 'title', 'description', 'organization', 'created_by_id', 'assigned_to_ids',
+                  'start_date', 'end_date', 'status', 'submission_date', 'score', 'feedback',
+                  'evaluation_date', 'created_at', 'updated_at', 'archived_at', 'archived']
+        read_only_fields = fields
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import jobs
+from .audit import audit_log
+from .models import Assignment, Employee
+from .resolvers import email_resolver
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def forget_employee_email(sender, instance, **kwargs):
+    email_resolver.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Assignment)
+def status_changed(sender, instance, created, raw=False, **kwargs):
+    previous = None if created else getattr(instance, '_loaded_status', None)
+    if raw or previous == instance.status:
+        return
+    audit_log.record(instance, previous, instance.status, getattr(instance, 'audit_actor_id', None))
+    instance._loaded_status = instance.status
+    if instance.status == 'SUBMITTED':
+        # MinHash is CPU-bound; keep it off the request (and its write lane)
+        jobs.enqueue('index_submission', {
+            'assignment_id': instance.pk, 'organization_id': instance.organization_id,
+        })
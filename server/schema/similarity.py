@@ -0,0 +1,173 @@
+# similarity.py
+"""Near-duplicate submissions with MinHash signatures and LSH buckets.
+
+A submission is reduced to its set of word shingles and a MinHash signature
+of ``SIMILARITY_NUM_PERM`` 32-bit values, whose agreement estimates the
+Jaccard similarity of two shingle sets. The signature is split into
+``SIMILARITY_BANDS`` bands and each band is hashed into a ``SubmissionBucket``
+row, so a lookup only compares submissions sharing at least one bucket
+instead of the whole cohort.
+"""
+import hashlib
+import random
+import re
+import struct
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import router, transaction
+
+from .batching import keyset_batches
+from .models import Assignment, SubmissionBucket, SubmissionSignature
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+_word = re.compile(r'\w+')
+
+
+def _setting(name, default):
+    return getattr(settings, f'SIMILARITY_{name}', default)
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_perm):
+    # fixed seed: signatures must stay comparable across processes and restarts
+    rng = random.Random(num_perm)
+    return tuple(
+        (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+    )
+
+
+def shingles(text, size=None):
+    size = size or _setting('SHINGLE_SIZE', 3)
+    words = _word.findall((text or '').lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def minhash(shingle_set, num_perm=None):
+    hashes = [_hash(shingle) for shingle in shingle_set]
+    if not hashes:
+        return None
+    return [
+        min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+        for a, b in _permutations(num_perm or _setting('NUM_PERM', 128))
+    ]
+
+
+def pack(signature):
+    return struct.pack(f'<{len(signature)}I', *signature)
+
+
+def unpack(packed):
+    packed = bytes(packed)
+    return struct.unpack(f'<{len(packed) // 4}I', packed)
+
+
+def band_keys(signature, bands=None):
+    bands = bands or _setting('BANDS', 32)
+    rows = len(signature) // bands
+    return [
+        int.from_bytes(
+            hashlib.blake2b(struct.pack('<H', band) + pack(signature[band * rows:(band + 1) * rows]),
+                            digest_size=8).digest(),
+            'little', signed=True,
+        )
+        for band in range(bands)
+    ]
+
+
+def estimate(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+
+def compute(rows):
+    """``(assignment_id, organization_id, body, is_compressed)`` rows to index entries.
+
+    Needs no database access, so the backfill can run it in worker processes.
+    """
+    entries = []
+    for assignment_id, organization_id, body, is_compressed in rows:
+        body = bytes(body)
+        text = (zlib.decompress(body) if is_compressed else body).decode('utf-8')
+        shingle_set = shingles(text)
+        entries.append((assignment_id, organization_id, minhash(shingle_set), len(shingle_set)))
+    return entries
+
+
+def store(entries):
+    """Replace the signatures and buckets of the given assignments"""
+    ids = [assignment_id for assignment_id, _, _, _ in entries]
+    with transaction.atomic(using=router.db_for_write(SubmissionSignature)):
+        SubmissionBucket.objects.filter(assignment_id__in=ids).delete()
+        SubmissionSignature.objects.filter(assignment_id__in=ids).delete()
+        signatures, buckets = [], []
+        for assignment_id, organization_id, signature, shingle_count in entries:
+            if signature is None:
+                continue
+            signatures.append(SubmissionSignature(
+                assignment_id=assignment_id, signature=pack(signature), shingles=shingle_count
+            ))
+            buckets.extend(
+                SubmissionBucket(assignment_id=assignment_id, organization_id=organization_id, bucket=key)
+                for key in band_keys(signature)
+            )
+        SubmissionSignature.objects.bulk_create(signatures, batch_size=500)
+        SubmissionBucket.objects.bulk_create(buckets, batch_size=1000)
+    return len(signatures)
+
+
+def index_assignment(assignment):
+    """Index the assignment's submission; returns its signature, None without text.
+
+    Runs in the ``index_submission`` job enqueued when an assignment is submitted.
+    """
+    shingle_set = shingles(assignment.submission_text)
+    signature = minhash(shingle_set)
+    store([(assignment.pk, assignment.organization_id, signature, len(shingle_set))])
+    return signature
+
+
+def similar(assignment, threshold=None, limit=20):
+    """``(similarity, assignment_id)`` pairs for the assignment's near-duplicates, best first"""
+    threshold = _setting('THRESHOLD', 0.5) if threshold is None else threshold
+    packed = SubmissionSignature.objects.filter(assignment_id=assignment.pk).values_list(
+        'signature', flat=True
+    ).first()
+    # not indexed yet (job still queued): hash in memory, reads never write
+    signature = unpack(packed) if packed is not None else minhash(shingles(assignment.submission_text))
+    if signature is None:
+        return []
+
+    candidates = SubmissionBucket.objects.filter(
+        organization_id=assignment.organization_id, bucket__in=band_keys(signature)
+    ).exclude(assignment_id=assignment.pk).values('assignment_id')
+    scored = []
+    for other_id, other in SubmissionSignature.objects.filter(
+        assignment_id__in=candidates
+    ).values_list('assignment_id', 'signature'):
+        score = estimate(signature, unpack(other))
+        if score >= threshold:
+            scored.append((score, other_id))
+    scored.sort(key=lambda pair: (-pair[0], pair[1]))
+    return scored[:limit]
+
+
+def pending_rows(batch_size=200, reindex=False):
+    """Batches of submissions still to be indexed, for the backfill"""
+    submissions = Assignment.objects.filter(
+        status__in=['SUBMITTED', 'EVALUATED'], submission__isnull=False
+    )
+    if not reindex:
+        submissions = submissions.filter(signature__isnull=True)
+    return keyset_batches(
+        submissions.values_list('id', 'organization_id', 'submission__body', 'submission__is_compressed'),
+        batch_size,
+    )
@@ -0,0 +1,353 @@
+# snapshot.py
+"""Bulk table-level snapshots of the schema app.
+
+Every table, including auto-created M2M through tables, is streamed in
+primary key order to its own gzip file without building model instances:
+
+* Postgres: ``COPY ... TO STDOUT (FORMAT csv)``, restored with ``COPY FROM``.
+* Other backends: JSON lines, a header row of column names followed by one
+  array of values per row, restored with batched ``executemany``.
+
+``manifest.json`` lists each file with its row count and sha256, which
+restore verifies before loading anything. Postgres tables are dumped in
+parallel from one exported snapshot and restored in parallel one dependency
+level at a time, parents first; SQLite runs a single worker.
+"""
+import base64
+import datetime
+import decimal
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+CHUNK_SIZE = 64 * 1024
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_models():
+    return list(apps.get_app_config('schema').get_models(include_auto_created=True))
+
+
+def restore_levels(models):
+    """Group models so every table comes after the tables it references"""
+    remaining = {model._meta.db_table: model for model in models}
+    levels = []
+    done = set()
+    while remaining:
+        level = [
+            model for table, model in remaining.items()
+            if all(parent in done or parent not in remaining for parent in _parents(model, table))
+        ]
+        if not level:
+            raise SnapshotError(f'Circular foreign keys between {sorted(remaining)}')
+        levels.append(level)
+        for model in level:
+            done.add(model._meta.db_table)
+            del remaining[model._meta.db_table]
+    return levels
+
+
+def _parents(model, table):
+    return {
+        field.related_model._meta.db_table
+        for field in model._meta.concrete_fields
+        if field.is_relation and field.db_constraint and field.related_model._meta.db_table != table
+    }
+
+
+def _columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def _binary_columns(model):
+    return [
+        index for index, field in enumerate(model._meta.concrete_fields)
+        if field.get_internal_type() == 'BinaryField'
+    ]
+
+
+def _normalizers(model):
+    """Per-column fixes so a row restores the same way on any backend"""
+    normalizers = []
+    for index, field in enumerate(model._meta.concrete_fields):
+        internal_type = field.get_internal_type()
+        if internal_type == 'JSONField':
+            # stored as text, so it restores without an adapter
+            normalizers.append((index, lambda value: value if isinstance(value, str) else json.dumps(value)))
+        elif internal_type == 'BooleanField':
+            # SQLite hands back 0/1
+            normalizers.append((index, bool))
+    return normalizers
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        # same layout Django writes to SQLite, so text comparisons keep working
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    raise TypeError(f'Cannot snapshot {type(value).__name__}')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _quoted(connection, model):
+    qn = connection.ops.quote_name
+    return qn(model._meta.db_table), ', '.join(qn(column) for column in _columns(model)), qn(model._meta.pk.column)
+
+
+def _raw_cursor(cursor):
+    # Django's CursorWrapper around the driver cursor
+    return getattr(cursor, 'cursor', cursor)
+
+
+def dump_table(model, directory, using='default', batch_size=5000, snapshot_id=None):
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        path, rows = _dump_copy(connection, model, directory, snapshot_id)
+        fmt = 'csv'
+    else:
+        path, rows = _dump_jsonl(connection, model, directory, batch_size)
+        fmt = 'jsonl'
+    return {
+        'model': model._meta.label,
+        'table': model._meta.db_table,
+        'file': os.path.basename(path),
+        'format': fmt,
+        'columns': _columns(model),
+        'rows': rows,
+        'sha256': _sha256(path),
+    }
+
+
+def _dump_copy(connection, model, directory, snapshot_id=None):
+    table, columns, pk = _quoted(connection, model)
+    path = os.path.join(directory, f'{model._meta.db_table}.csv.gz')
+    sql = f'COPY (SELECT {columns} FROM {table} ORDER BY {pk}) TO STDOUT WITH (FORMAT csv, HEADER true)'
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if snapshot_id:
+            # see the same data as every other worker
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot_id])
+        with gzip.open(path, 'wb', compresslevel=6) as out:
+            raw = _raw_cursor(cursor)
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, out)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    for data in copy:
+                        out.write(data)
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        rows = cursor.fetchone()[0]
+    return path, rows
+
+
+def _dump_jsonl(connection, model, directory, batch_size):
+    table, columns, pk = _quoted(connection, model)
+    normalizers = _normalizers(model)
+    path = os.path.join(directory, f'{model._meta.db_table}.jsonl.gz')
+    pk_index = _columns(model).index(model._meta.pk.column)
+    first = f'SELECT {columns} FROM {table} ORDER BY {pk} LIMIT %s'
+    following = f'SELECT {columns} FROM {table} WHERE {pk} > %s ORDER BY {pk} LIMIT %s'
+    rows = 0
+    last_pk = None
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as out:
+            out.write(json.dumps(_columns(model)) + '\n')
+            while True:
+                if last_pk is None:
+                    cursor.execute(first, [batch_size])
+                else:
+                    cursor.execute(following, [last_pk, batch_size])
+                batch = cursor.fetchall()
+                if not batch:
+                    break
+                for row in batch:
+                    row = list(row)
+                    for index, normalize in normalizers:
+                        if row[index] is not None:
+                            row[index] = normalize(row[index])
+                    out.write(json.dumps(row, default=_encode, separators=(',', ':')) + '\n')
+                rows += len(batch)
+                last_pk = batch[-1][pk_index]
+    return path, rows
+
+
+def _run(func, items, using, workers):
+    """Map ``func`` over ``items``, on worker threads when ``workers`` > 1"""
+    if workers <= 1:
+        return [func(item) for item in items]
+
+    def run(item):
+        try:
+            return func(item)
+        finally:
+            # each worker thread opened its own connection
+            connections[using].close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, items))
+
+
+def dump(directory, using='default', workers=4, batch_size=5000, progress=None):
+    os.makedirs(directory, exist_ok=True)
+    models = snapshot_models()
+    connection = connections[using]
+
+    def run(model, snapshot_id=None):
+        entry = dump_table(model, directory, using, batch_size, snapshot_id)
+        if progress:
+            progress(entry)
+        return entry
+
+    # one transaction keeps the tables consistent with each other; on Postgres
+    # it needs REPEATABLE READ for every COPY to see the same snapshot, and
+    # parallel workers join it through an exported snapshot
+    with transaction.atomic(using=using):
+        snapshot_id = None
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+                if workers > 1:
+                    cursor.execute('SELECT pg_export_snapshot()')
+                    snapshot_id = cursor.fetchone()[0]
+        else:
+            workers = 1
+        tables = _run(lambda model: run(model, snapshot_id), models, using, workers)
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'vendor': connection.vendor,
+        'created_at': timezone.now().isoformat(),
+        'tables': tables,
+    }
+    with open(os.path.join(directory, MANIFEST), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def read_manifest(directory, verify=True):
+    with open(os.path.join(directory, MANIFEST)) as handle:
+        manifest = json.load(handle)
+    if manifest.get('version') != FORMAT_VERSION:
+        raise SnapshotError(f'Unsupported snapshot version {manifest.get("version")}')
+    if verify:
+        for entry in manifest['tables']:
+            if _sha256(os.path.join(directory, entry['file'])) != entry['sha256']:
+                raise SnapshotError(f'Checksum mismatch for {entry["file"]}')
+    return manifest
+
+
+def restore_table(model, entry, directory, using='default', batch_size=5000):
+    connection = connections[using]
+    if entry['columns'] != _columns(model):
+        raise SnapshotError(f'Columns of {entry["table"]} changed since the snapshot was taken')
+    path = os.path.join(directory, entry['file'])
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        table = connection.ops.quote_name(model._meta.db_table)
+        cursor.execute(f'SELECT 1 FROM {table} LIMIT 1')
+        if cursor.fetchone():
+            raise SnapshotError(f'{model._meta.db_table} is not empty')
+        if entry['format'] == 'csv':
+            if connection.vendor != 'postgresql':
+                raise SnapshotError(f'{entry["file"]} is a Postgres COPY dump')
+            rows = _restore_copy(connection, cursor, model, path)
+        else:
+            rows = _restore_jsonl(connection, cursor, model, path, batch_size)
+    if rows != entry['rows']:
+        raise SnapshotError(f'{entry["table"]}: restored {rows} of {entry["rows"]} row(s)')
+    return rows
+
+
+def _restore_copy(connection, cursor, model, path):
+    table, columns, _ = _quoted(connection, model)
+    sql = f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, HEADER true)'
+    with gzip.open(path, 'rb') as source:
+        raw = _raw_cursor(cursor)
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(sql, source)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    copy.write(chunk)
+    cursor.execute(f'SELECT COUNT(*) FROM {table}')
+    return cursor.fetchone()[0]
+
+
+def _restore_jsonl(connection, cursor, model, path, batch_size):
+    table, columns, _ = _quoted(connection, model)
+    binary_columns = _binary_columns(model)
+    placeholders = ', '.join(['%s'] * len(_columns(model)))
+    sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+    rows = 0
+    batch = []
+    with gzip.open(path, 'rt', encoding='utf-8') as source:
+        next(source)  # header
+        for line in source:
+            row = json.loads(line)
+            for index in binary_columns:
+                if row[index] is not None:
+                    row[index] = base64.b64decode(row[index])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                rows += len(batch)
+                batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        rows += len(batch)
+    return rows
+
+
+def restore(directory, using='default', workers=4, batch_size=5000, progress=None):
+    manifest = read_manifest(directory)
+    entries = {entry['table']: entry for entry in manifest['tables']}
+    models = [model for model in snapshot_models() if model._meta.db_table in entries]
+    if connections[using].vendor == 'sqlite':
+        # SQLite has a single writer; parallel loads would only wait on each other
+        workers = 1
+
+    def run(model):
+        rows = restore_table(model, entries[model._meta.db_table], directory, using, batch_size)
+        if progress:
+            progress(model._meta.db_table, rows)
+        return rows
+
+    restored = {}
+    connection = connections[using]
+    # a single worker restores everything in one transaction; parallel
+    # workers commit table by table, parents first
+    with transaction.atomic(using=using) if workers <= 1 else nullcontext():
+        for level in restore_levels(models):
+            for model, rows in zip(level, _run(run, level, using, workers)):
+                restored[model._meta.db_table] = rows
+
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+    return restored
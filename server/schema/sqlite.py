@@ -0,0 +1,96 @@
+# sqlite.py
+"""SQLite tuning for single-node deployments.
+
+Every new SQLite connection runs the PRAGMAs in ``SQLITE_PRAGMAS``. WAL
+lets readers keep reading while a write is in progress, ``synchronous=NORMAL``
+is durable in WAL mode up to the last checkpoint, and ``busy_timeout`` makes
+a writer wait for the lock instead of failing with "database is locked".
+
+WAL still allows a single writer at a time, and a deferred transaction that
+reads before it writes fails immediately when another connection commits in
+between, whatever the timeout. ``WriteLaneMiddleware`` therefore runs
+requests with unsafe methods one at a time per process inside
+``write_lane()``, while safe methods run concurrently. Code that waits
+inside such a request (the Idempotency-Key retry polling for the first
+request) steps out with ``outside_write_lane()``. Writers in other processes
+(job workers, other server processes) are queued by ``busy_timeout``.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+_write_lane = threading.Lock()
+_held = threading.local()
+
+
+def pragmas():
+    configured = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    return dict(configured or {})
+
+
+def apply_pragmas(connection, values=None):
+    """Run ``values`` (default ``SQLITE_PRAGMAS``) on a DB-API or Django SQLite connection"""
+    values = pragmas() if values is None else values
+    cursor = connection.cursor()
+    try:
+        for name, value in values.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection)
+
+
+def uses_sqlite():
+    return any(connections[alias].vendor == 'sqlite' for alias in connections)
+
+
+def write_lane_enabled():
+    return getattr(settings, 'SQLITE_WRITE_LANE', True) and uses_sqlite()
+
+
+@contextmanager
+def write_lane():
+    """Hold this process's single SQLite writer lane; reentrant per thread"""
+    depth = getattr(_held, 'depth', 0)
+    if not depth:
+        _write_lane.acquire()
+    _held.depth = depth + 1
+    try:
+        yield
+    finally:
+        _held.depth = depth
+        if not depth:
+            _write_lane.release()
+
+
+@contextmanager
+def outside_write_lane():
+    """Let other writers through while this thread idles, e.g. polling or sleeping"""
+    depth = getattr(_held, 'depth', 0)
+    if depth:
+        _held.depth = 0
+        _write_lane.release()
+    try:
+        yield
+    finally:
+        if depth:
+            _write_lane.acquire()
+            _held.depth = depth
+
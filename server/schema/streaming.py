@@ -0,0 +1,83 @@
+# streaming.py
+"""Memory-bounded JSON arrays for unpaginated list actions.
+
+With ``?stream=1`` a list is walked with ``QuerySet.iterator(chunk_size)``,
+which also runs ``prefetch_related`` per chunk, and each serialized chunk is
+written out before the next is fetched. Peak memory is one chunk, however
+long the list.
+"""
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+
+from . import routers
+from .renderers import ORJSONRenderer
+
+STREAM_PARAM = 'stream'
+
+
+def flag_requested(request, name):
+    return request.query_params.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def stream_requested(request):
+    return flag_requested(request, STREAM_PARAM)
+
+
+def _chunks(queryset, chunk_size):
+    chunk = []
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_json(queryset, serializer_class, context=None, chunk_size=500, extra=()):
+    """Stream ``queryset`` followed by any ``(queryset, serializer_class)`` pairs in ``extra``"""
+    renderer = ORJSONRenderer()
+    # TenantMiddleware unbinds the organization before the body is consumed
+    organization_id = routers.current_organization()
+
+    def generate():
+        with routers.use_organization(organization_id):
+            yield b'['
+            separator = b''
+            for part, part_serializer in [(queryset, serializer_class), *extra]:
+                for chunk in _chunks(part, chunk_size):
+                    data = part_serializer(chunk, many=True, context=context).data
+                    yield separator + renderer.render(data)[1:-1]
+                    separator = b','
+            yield b']'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+class StreamingListMixin:
+    """``list`` and list actions that stream when the client asks for ``?stream=1``"""
+    stream_chunk_size = 500
+
+    def list_queryset(self, queryset):
+        """Hook for the select/prefetch_related a serialized list needs"""
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is None:
+            return self.list_response(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def list_response(self, queryset, extra=()):
+        """Serialize ``queryset``, then each ``(queryset, serializer_class)`` in ``extra``, as one list"""
+        if isinstance(queryset, QuerySet):
+            queryset = self.list_queryset(queryset)
+            if stream_requested(self.request):
+                return stream_json(
+                    queryset, self.get_serializer_class(), self.get_serializer_context(), self.stream_chunk_size,
+                    extra,
+                )
+        data = self.get_serializer(queryset, many=True).data
+        for part, serializer_class in extra:
+            data += serializer_class(part, many=True, context=self.get_serializer_context()).data
+        return Response(data)
@@ -0,0 +1,56 @@
+# submissions.py
+"""Content-addressed storage for submission attachments under MEDIA_ROOT.
+
+Uploads are streamed to a temporary file in chunks while being hashed, then
+moved to ``submissions/<aa>/<sha256>``; identical files are stored once.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+from .models import SubmissionAttachment
+
+CHUNK_SIZE = 64 * 1024
+STORAGE_DIR = 'submissions'
+
+
+def attachment_path(name):
+    return os.path.join(settings.MEDIA_ROOT, name)
+
+
+def store_attachment(submission, uploaded_file):
+    root = os.path.join(settings.MEDIA_ROOT, STORAGE_DIR)
+    os.makedirs(root, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in uploaded_file.chunks(CHUNK_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        name = os.path.join(STORAGE_DIR, sha256[:2], sha256)
+        final_path = attachment_path(name)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return SubmissionAttachment.objects.create(
+        submission=submission,
+        file=name,
+        original_name=os.path.basename(uploaded_file.name or sha256)[:255],
+        content_type=getattr(uploaded_file, 'content_type', '') or '',
+        size=size,
+        sha256=sha256,
+    )
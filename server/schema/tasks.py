@@ -0,0 +1,172 @@
+# tasks.py
+"""Background job handlers, see jobs.py"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count
+from rest_framework.renderers import JSONRenderer
+
+from .archive import archive_evaluated
+from .deadlines import sweep
+from .grading import autograde
+from .idempotency import purge_expired
+from .similarity import index_assignment
+from .purge import employee_plan, organization_plan, purge
+from .recurrence import generate, generate_all
+from .routers import each_shard, use_organization
+from .jobs import task
+from .models import Assignment, AssignmentEvaluation, AssignmentTemplate, Employee, Organization
+from .serializers import AssignmentEvaluationSerializer, AssignmentSerializer
+
+EXPORT_CHUNK_SIZE = 500
+
+
+@task('export_assignments')
+def export_assignments(job):
+    assignments = Assignment.objects.select_related(
+        'organization', 'created_by'
+    ).prefetch_related('assigned_to').order_by('id')
+    if job.payload.get('organization_id'):
+        assignments = assignments.filter(organization_id=job.payload['organization_id'])
+    job.report_progress(0, assignments.count())
+
+    relative_path = os.path.join('exports', f'assignments-{job.pk}.json')
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    renderer = JSONRenderer()
+    written = 0
+    chunk = []
+    with open(path, 'wb') as out:
+        out.write(b'[')
+        for assignment in assignments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            chunk.append(assignment)
+            if len(chunk) == EXPORT_CHUNK_SIZE:
+                written = _write_chunk(out, renderer, AssignmentSerializer(chunk, many=True).data, written)
+                job.report_progress(written)
+                chunk = []
+        if chunk:
+            written = _write_chunk(out, renderer, AssignmentSerializer(chunk, many=True).data, written)
+        out.write(b']')
+    return {'path': relative_path, 'count': written}
+
+
+def _write_chunk(out, renderer, rows, written):
+    for row in rows:
+        if written:
+            out.write(b',')
+        out.write(renderer.render(row))
+        written += 1
+    return written
+
+
+@task('rebuild_stats')
+def rebuild_stats(job):
+    stats = {}
+    # each organization lives on exactly one shard, so per-shard rows never overlap
+    for alias in each_shard():
+        by_status = Assignment.objects.values('organization_id', 'status').annotate(count=Count('id'))
+        for row in by_status:
+            org_stats = stats.setdefault(str(row['organization_id']), {'by_status': {}, 'average_score': None})
+            org_stats['by_status'][row['status']] = row['count']
+        scores = AssignmentEvaluation.objects.values('assignment__organization_id').annotate(avg=Avg('score'))
+        for row in scores:
+            org_stats = stats.setdefault(
+                str(row['assignment__organization_id']), {'by_status': {}, 'average_score': None}
+            )
+            org_stats['average_score'] = round(row['avg'], 2)
+    return stats
+
+
+@task('bulk_grade')
+def bulk_grade(job):
+    evaluations = job.payload.get('evaluations', [])
+    job.report_progress(0, len(evaluations))
+    created, errors = 0, []
+    for index, data in enumerate(evaluations, start=1):
+        serializer = AssignmentEvaluationSerializer(data=data)
+        if serializer.is_valid():
+            serializer.save()
+            created += 1
+        else:
+            errors.append({'assignment': data.get('assignment'), 'errors': serializer.errors})
+        if index % 50 == 0:
+            job.report_progress(index)
+    return {'created': created, 'errors': errors}
+
+
+@task('deadline_sweep')
+def deadline_sweep(job):
+    return sweep(batch_size=job.payload.get('batch_size', 500))
+
+
+@task('archive_assignments')
+def archive_assignments(job):
+    archived = archive_evaluated(
+        job.payload.get('older_than_days'),
+        batch_size=job.payload.get('batch_size', 500),
+        progress=job.report_progress,
+    )
+    return {'archived': archived}
+
+
+@task('purge_idempotency_keys')
+def purge_idempotency_keys(job):
+    return {'deleted': purge_expired()}
+
+
+@task('index_submission', public=False)
+def index_submission(job):
+    with use_organization(job.payload.get('organization_id')):
+        assignment = Assignment.objects.filter(
+            pk=job.payload['assignment_id'], status__in=['SUBMITTED', 'EVALUATED']
+        ).first()
+        if assignment is None:
+            return {'indexed': False}
+        return {'indexed': index_assignment(assignment) is not None}
+
+
+# enqueued by the destroy views only, after the soft delete
+@task('purge_organization', public=False)
+def purge_organization(job):
+    organization_id = job.payload['organization_id']
+    with use_organization(organization_id):
+        if not Organization.objects.filter(pk=organization_id, deleted_at__isnull=False).exists():
+            return {'skipped': 'Organization is not soft-deleted'}
+        return purge(organization_plan(organization_id), job.payload.get('batch_size', 1000), job.report_progress)
+
+
+@task('purge_employee', public=False)
+def purge_employee(job):
+    with use_organization(job.payload.get('organization_id')):
+        if not Employee.objects.filter(pk=job.payload['employee_id'], deleted_at__isnull=False).exists():
+            return {'skipped': 'Employee is not soft-deleted'}
+        return purge(employee_plan(job.payload['employee_id']), job.payload.get('batch_size', 1000), job.report_progress)
+
+
+@task('autograde')
+def autograde_submissions(job):
+    organization_id = job.payload['organization_id']
+    with use_organization(organization_id):
+        return autograde(
+            organization_id,
+            processes=job.payload.get('processes', getattr(settings, 'AUTOGRADE_PROCESSES', 1)),
+            batch_size=job.payload.get('batch_size', 200),
+            regrade=job.payload.get('regrade', False),
+        )
+
+
+@task('generate_assignments')
+def generate_assignments(job):
+    organization_id = job.payload.get('organization_id')
+    ahead_days = job.payload.get('ahead_days')
+    ahead = timedelta(days=ahead_days) if ahead_days is not None else None
+    with use_organization(organization_id):
+        if job.payload.get('template_id'):
+            # may have been deactivated since the job was enqueued
+            template = AssignmentTemplate.objects.filter(pk=job.payload['template_id'], is_active=True).first()
+            created = {template.pk: generate(template, ahead=ahead)} if template else {}
+        else:
+            created = generate_all(ahead=ahead, organization_id=organization_id)
+    return {'created': {str(pk): count for pk, count in created.items()}}
@@ -1,10 +1,55 @@
-from django.test import TestCase
+import gzip
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+import msgpack
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from datetime import datetime, timedelta
-from .models import Organization, Employee, Assignment, AssignmentEvaluation
+from .models import (
+    Organization, Employee, Assignment, AssignmentEvaluation, Notification, Submission, TenantShard,
+    ArchivedAssignment, IdempotencyRecord, AssignmentTransition, Job, SubmissionBucket, SubmissionSignature,
+    Rubric, AssignmentTemplate
+)
+from . import archive, deadlines, grading, jobs, recurrence, routers, similarity, snapshot
+from . import sqlite as sqlite_tuning
+from .audit import AuditBuffer, audit_log
+from .middleware import AdmissionControlMiddleware, CompressionMiddleware, TenantMiddleware, WriteLaneMiddleware
+from .purge import batched_delete
+from .resolvers import email_resolver
+from .throttling import TokenBucket
+
+# keep throttle buckets out of the file-based cache a dev server shares
+test_caches = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle'},
+    'directory': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'directory'},
+})
+
+
+def setUpModule():
+    test_caches.enable()
+
+
+def tearDownModule():
+    test_caches.disable()
+
 
 class OrganizationTests(APITestCase):
     def setUp(self):
@@ -259,3 +304,1338 @@ class AssignmentEvaluationTests(APITestCase):
         data['score'] = 101
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class EmployeeProfileTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.intern = Employee.objects.create(
+            first_name='Ivan', last_name='Intern', email='ivan@test.com', phone='+1-555-1001',
+            role='INTERN', organization=self.org, joining_date='2024-01-02'
+        )
+
+    def _create_assignments(self, count):
+        for i in range(count):
+            assignment = Assignment.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                organization=self.org,
+                created_by=self.admin,
+                start_date=timezone.now(),
+                end_date=timezone.now() + timedelta(days=i + 1),
+                status='SUBMITTED'
+            )
+            assignment.assigned_to.add(self.intern)
+            AssignmentEvaluation.objects.create(assignment=assignment, score=80, feedback='Good')
+
+    def test_profile_contents(self):
+        self._create_assignments(2)
+        url = reverse('employee-profile', args=[self.intern.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['employee']['email'], 'ivan@test.com')
+        self.assertEqual(response.data['organization']['name'], 'Test Corp')
+        self.assertEqual(len(response.data['assigned_assignments']), 2)
+        self.assertEqual(len(response.data['evaluations']), 2)
+        self.assertEqual(response.data['stats']['by_status']['EVALUATED'], 2)
+        self.assertEqual(response.data['stats']['average_score'], 80)
+
+    def test_profile_query_count_is_constant(self):
+        self._create_assignments(1)
+        url = reverse('employee-profile', args=[self.admin.id])
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        self._create_assignments(5)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['created_assignments']), 6)
+
+class JobQueueTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.assignment = Assignment.objects.create(
+            title='Test Project',
+            description='Test Description',
+            organization=self.org,
+            created_by=self.admin,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=30),
+            status='SUBMITTED'
+        )
+        # the submission's index_submission job
+        jobs.work('setup-worker', burst=True)
+
+    def test_enqueue_returns_accepted(self):
+        response = self.client.post(reverse('job-list'), {'kind': 'rebuild_stats'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'QUEUED')
+
+        response = self.client.post(reverse('job-list'), {'kind': 'no_such_job'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_worker_runs_queued_jobs(self):
+        stats_job = jobs.enqueue('rebuild_stats')
+        response = self.client.post(reverse('assignmentevaluation-bulk-grade'), {
+            'evaluations': [{'assignment': self.assignment.id, 'score': 90, 'feedback': 'Great'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.assertEqual(jobs.work('test-worker', burst=True), 2)
+
+        stats_job.refresh_from_db()
+        self.assertEqual(stats_job.status, 'SUCCEEDED')
+        self.assertEqual(stats_job.result[str(self.org.id)]['by_status']['SUBMITTED'], 1)
+        progress = self.client.get(reverse('job-progress', args=[response.data['id']]))
+        self.assertEqual(progress.data['status'], 'SUCCEEDED')
+        self.assertEqual(progress.data['percent'], 100)
+        self.assertEqual(AssignmentEvaluation.objects.count(), 1)
+
+    def test_failed_job_records_error(self):
+        job = jobs.enqueue('bulk_grade', {'evaluations': None})
+        jobs.work('test-worker', burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+        self.assertIn('TypeError', job.error)
+
+    def test_claim_is_exclusive(self):
+        job = jobs.enqueue('rebuild_stats')
+        self.assertEqual(jobs.claim_next('worker-a').pk, job.pk)
+        self.assertIsNone(jobs.claim_next('worker-b'))
+
+    def test_requeue_stale_uses_heartbeat_and_attempts(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        alive = jobs.enqueue('rebuild_stats')
+        retry = jobs.enqueue('rebuild_stats', max_attempts=3)
+        exhausted = jobs.enqueue('rebuild_stats')
+        Job.objects.filter(pk__in=[alive.pk, retry.pk, exhausted.pk]).update(
+            status='RUNNING', attempts=1, started_at=long_ago
+        )
+        Job.objects.filter(pk__in=[retry.pk, exhausted.pk]).update(updated_at=long_ago)
+
+        self.assertEqual(jobs.requeue_stale(), {'requeued': 1, 'failed': 1})
+        statuses = dict(Job.objects.filter(pk__in=[alive.pk, retry.pk, exhausted.pk]).values_list('pk', 'status'))
+        self.assertEqual(statuses, {alive.pk: 'RUNNING', retry.pk: 'QUEUED', exhausted.pk: 'FAILED'})
+
+    def test_heartbeat_bumps_running_job(self):
+        job = jobs.enqueue('rebuild_stats')
+        # the side thread has its own connection, which cannot see this test's transaction
+        with patch('schema.jobs.Job') as model:
+            with jobs.heartbeat(job, interval=0.01):
+                time.sleep(0.1)
+        model.objects.filter.assert_called_with(pk=job.pk, status='RUNNING')
+        self.assertTrue(model.objects.filter.return_value.update.called)
+
+class DeadlineSweeperTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.intern = Employee.objects.create(
+            first_name='Ivan', last_name='Intern', email='ivan@test.com', phone='+1-555-1001',
+            role='INTERN', organization=self.org, joining_date='2024-01-02'
+        )
+        self.now = timezone.now()
+        self.overdue = self._assignment('Late', self.now - timedelta(hours=1))
+        self.due_soon = self._assignment('Soon', self.now + timedelta(days=1))
+        self.later = self._assignment('Later', self.now + timedelta(days=10))
+
+    def _assignment(self, title, end_date):
+        assignment = Assignment.objects.create(
+            title=title,
+            description='Test Description',
+            organization=self.org,
+            created_by=self.admin,
+            start_date=self.now - timedelta(days=5),
+            end_date=end_date
+        )
+        assignment.assigned_to.add(self.intern)
+        return assignment
+
+    def test_sweep_flags_and_notifies_once(self):
+        self.assertEqual(deadlines.sweep(self.now, batch_size=1), {'overdue': 1, 'due_soon': 1})
+        self.assertEqual(deadlines.sweep(self.now), {'overdue': 0, 'due_soon': 0})
+
+        kinds = dict(Notification.objects.values_list('assignment_id', 'kind'))
+        self.assertEqual(kinds, {self.overdue.id: 'OVERDUE', self.due_soon.id: 'DUE_SOON'})
+        response = self.client.get(reverse('notification-list'), {'employee_id': self.intern.id})
+        self.assertEqual(len(response.data), 2)
+
+    def test_next_boundary(self):
+        deadlines.sweep(self.now)
+        # the due-soon assignment becomes overdue before the later one comes due soon
+        self.assertEqual(deadlines.next_boundary(), self.due_soon.end_date)
+        self.due_soon.status = 'SUBMITTED'
+        self.due_soon.save()
+        self.assertEqual(deadlines.next_boundary(), self.later.end_date - deadlines.due_soon_window())
+
+class SubmissionStorageTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.assignment = Assignment.objects.create(
+            title='Test Project',
+            description='Test Description',
+            organization=self.org,
+            created_by=self.admin,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=30),
+            status='IN_PROGRESS'
+        )
+
+    def test_large_submission_is_compressed(self):
+        text = 'a long and repetitive answer ' * 200
+        self.assignment.submit(text)
+        submission = Submission.objects.get(assignment=self.assignment)
+        self.assertTrue(submission.is_compressed)
+        self.assertLess(len(bytes(submission.body)), submission.size)
+        self.assertEqual(Assignment.objects.get(pk=self.assignment.pk).submission_text, text)
+
+    def test_submission_only_loaded_by_detail(self):
+        self.assignment.submit('my answer')
+        response = self.client.get(reverse('assignment-list'))
+        self.assertNotIn('submission_text', response.data[0])
+        response = self.client.get(reverse('assignment-detail', args=[self.assignment.id]))
+        self.assertEqual(response.data['submission_text'], 'my answer')
+        response = self.client.get(reverse('assignment-submission', args=[self.assignment.id]))
+        self.assertEqual(response.data['text'], 'my answer')
+
+    def test_attachments_are_content_addressed(self):
+        url = reverse('assignment-attachments', args=[self.assignment.id])
+        with override_settings(MEDIA_ROOT=self.media_root):
+            first = self.client.post(url, {'file': SimpleUploadedFile('a.txt', b'same bytes')}, format='multipart')
+            second = self.client.post(url, {'file': SimpleUploadedFile('b.txt', b'same bytes')}, format='multipart')
+            self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(first.data['sha256'], second.data['sha256'])
+            download = self.client.get(
+                reverse('assignment-download-attachment', args=[self.assignment.id, second.data['id']])
+            )
+            self.assertEqual(b''.join(download.streaming_content), b'same bytes')
+
+    def test_attachments_need_an_open_submission(self):
+        url = reverse('assignment-attachments', args=[self.assignment.id])
+        with override_settings(MEDIA_ROOT=self.media_root):
+            uploaded = self.client.post(url, {'file': SimpleUploadedFile('a.txt', b'bytes')}, format='multipart')
+            Assignment.objects.filter(pk=self.assignment.pk).update(status='EVALUATED')
+            response = self.client.post(url, {'file': SimpleUploadedFile('b.txt', b'more')}, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            shutil.rmtree(self.media_root)
+            download = self.client.get(
+                reverse('assignment-download-attachment', args=[self.assignment.id, uploaded.data['id']])
+            )
+            self.assertEqual(download.status_code, status.HTTP_404_NOT_FOUND)
+
+class ResponseFormatTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            description='x' * 2000,
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+
+    def test_msgpack_negotiation(self):
+        response = self.client.get(reverse('organization-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)[0]['name'], 'Test Corp')
+
+        response = self.client.post(
+            reverse('organization-list'),
+            msgpack.packb({'name': 'Packed Corp', 'address': 'A', 'contact_email': 'p@test.com',
+                           'contact_phone': '1'}),
+            content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_large_responses_are_compressed(self):
+        response = self.client.get(reverse('organization-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'Test Corp', gzip.decompress(response.content))
+
+        response = self.client.get(reverse('organization-detail', args=[self.org.id]) + '?format=json',
+                                   HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_binary_and_file_responses_are_not_compressed(self):
+        factory = RequestFactory()
+        request = factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        binary = HttpResponse(b'x' * 4096, content_type='application/zip')
+        self.assertFalse(CompressionMiddleware(lambda request: binary)(request).has_header('Content-Encoding'))
+        download = FileResponse(BytesIO(b'x' * 4096), as_attachment=True, filename='notes.txt')
+        response = CompressionMiddleware(lambda request: download)(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Length'], '4096')
+
+class TenantRouterTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.router = routers.TenantRouter()
+        self.addCleanup(caches['directory'].clear)
+
+    @override_settings(SCHEMA_SHARDS=['default', 'shard_b'])
+    def test_routes_by_directory_entry(self):
+        TenantShard.objects.create(organization_id=self.org.id, alias='shard_b')
+        employee = Employee(organization_id=self.org.id)
+        self.assertEqual(self.router.db_for_write(Employee, instance=employee), 'shard_b')
+        with routers.use_organization(self.org.id):
+            self.assertEqual(self.router.db_for_read(Assignment), 'shard_b')
+        self.assertIsNone(self.router.db_for_read(Assignment))
+        self.assertEqual(self.router.db_for_read(TenantShard), 'default')
+
+    @override_settings(SCHEMA_SHARDS=['default', 'shard_b'])
+    def test_forget_shard_reaches_the_shared_cache(self):
+        TenantShard.objects.create(organization_id=self.org.id, alias='shard_b')
+        self.assertEqual(routers.shard_for_organization(self.org.id), 'shard_b')
+        self.assertEqual(caches['directory'].get(f'tenant-shard:{self.org.id}'), 'shard_b')
+        TenantShard.objects.filter(organization_id=self.org.id).update(alias='default')
+        routers.forget_shard(self.org.id)
+        self.assertEqual(routers.shard_for_organization(self.org.id), 'default')
+
+    @override_settings(SCHEMA_SHARDS=['default', 'shard_b'])
+    def test_unbound_queries_follow_the_current_shard(self):
+        self.assertEqual(
+            [(alias, self.router.db_for_read(Assignment)) for alias in routers.each_shard()],
+            [('default', 'default'), ('shard_b', 'shard_b')],
+        )
+        self.assertIsNone(self.router.db_for_read(Assignment))
+
+    @override_settings(SCHEMA_SHARDS=['default', 'shard_b'])
+    def test_frozen_organization_rejects_writes(self):
+        TenantShard.objects.create(organization_id=self.org.id, alias='default', frozen=True)
+        middleware = TenantMiddleware(lambda request: HttpResponse('ok'))
+        factory = RequestFactory()
+        response = middleware(factory.post('/api/assignments/', HTTP_X_ORGANIZATION_ID=str(self.org.id)))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        response = middleware(factory.get('/api/assignments/', HTTP_X_ORGANIZATION_ID=str(self.org.id)))
+        self.assertEqual(response.status_code, 200)
+
+    def test_single_shard_is_a_no_op(self):
+        with routers.use_organization(self.org.id):
+            self.assertIsNone(self.router.db_for_read(Assignment))
+        self.assertEqual(routers.fan_out(lambda alias: [alias]), ['default'])
+
+    def test_fan_out_merges_results(self):
+        merged = routers.fan_out(lambda alias: [f'{alias}-1', f'{alias}-2'], aliases=['default', 'default'])
+        self.assertEqual(merged, ['default-1', 'default-2', 'default-1', 'default-2'])
+
+class ArchivalTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.old = self._evaluated('Old', timezone.now() - timedelta(days=400))
+        self.recent = self._evaluated('Recent', timezone.now())
+
+    def _evaluated(self, title, evaluation_date):
+        assignment = Assignment.objects.create(
+            title=title,
+            description='Test Description',
+            organization=self.org,
+            created_by=self.admin,
+            start_date=timezone.now() - timedelta(days=500),
+            end_date=timezone.now(),
+            status='IN_PROGRESS'
+        )
+        assignment.assigned_to.add(self.admin)
+        assignment.submit('answer ' * 500)
+        AssignmentEvaluation.objects.create(
+            assignment=assignment, score=70, feedback='Fine', evaluation_date=evaluation_date
+        )
+        return assignment
+
+    def test_archive_moves_old_evaluated_assignments(self):
+        self.assertEqual(archive.archive_evaluated(older_than_days=180, batch_size=1), 1)
+        self.assertFalse(Assignment.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Submission.objects.filter(assignment_id=self.old.pk).exists())
+        archived = ArchivedAssignment.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.score, 70)
+        self.assertEqual(archived.assigned_to_ids, [self.admin.id])
+        self.assertEqual(archived.submission_text, 'answer ' * 500)
+
+    def test_archive_only_read_on_request(self):
+        archive.archive_evaluated(older_than_days=180)
+        response = self.client.get(reverse('assignment-evaluated'))
+        self.assertEqual([row['id'] for row in response.data], [self.recent.id])
+        response = self.client.get(reverse('assignment-evaluated'), {'include_archived': 1})
+        self.assertEqual(len(response.data), 2)
+        response = self.client.get(reverse('assignment-archived'), {'organization_id': self.org.id})
+        self.assertEqual(response.data[0]['id'], self.old.id)
+
+    def test_evaluated_with_archive_parses_flag_filters_and_streams(self):
+        archive.archive_evaluated(older_than_days=180)
+        url = reverse('assignment-evaluated')
+        response = self.client.get(url, {'include_archived': 'false'})
+        self.assertEqual([row['id'] for row in response.data], [self.recent.id])
+        response = self.client.get(url, {'include_archived': 'true', 'stream': 1})
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['id'] for row in rows], [self.recent.id, self.old.id])
+        other = Organization.objects.create(
+            name='Other Corp', address='Other Address', contact_email='other@test.com', contact_phone='+1-555-9999'
+        )
+        response = self.client.get(url, {'include_archived': 1, 'organization_id': other.id})
+        self.assertEqual(response.data, [])
+
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket(cache, 'test-bucket', capacity=10, refill_per_second=2)
+        self.assertEqual(bucket.consume(8, now=100), 0)
+        self.assertEqual(bucket.consume(4, now=100), 1)
+        self.assertEqual(bucket.consume(4, now=101), 0)
+
+    def test_expensive_endpoints_cost_more(self):
+        throttle = {
+            'ENABLED': True,
+            'CACHE': 'default',
+            'CLIENT': {'capacity': 10, 'refill_per_second': 0.01},
+            'ENDPOINT': {'capacity': 1000, 'refill_per_second': 1},
+            'COSTS': {'default': 1, 'list': 5},
+        }
+        with override_settings(SCHEMA_THROTTLE=throttle):
+            self.assertEqual(self.client.get(reverse('organization-list')).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(reverse('organization-list')).status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse('organization-list'))
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', response)
+
+    def test_rejected_client_does_not_drain_endpoint(self):
+        throttle = {
+            'ENABLED': True,
+            'CACHE': 'default',
+            'CLIENT': {'capacity': 10, 'refill_per_second': 0.01},
+            'ENDPOINT': {'capacity': 20, 'refill_per_second': 0.01},
+            'COSTS': {'default': 1},
+        }
+        url = reverse('organization-list')
+        with override_settings(SCHEMA_THROTTLE=throttle):
+            statuses = [self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code for _ in range(60)]
+            self.assertEqual(statuses.count(status.HTTP_200_OK), 10)
+            response = self.client.get(url, REMOTE_ADDR='10.0.0.2')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_admission_control_sheds_list_reads_first(self):
+        middleware = AdmissionControlMiddleware(lambda request: None)
+        middleware.in_flight = 16
+        factory = RequestFactory()
+        shed = middleware(factory.get(reverse('assignment-list')))
+        self.assertEqual(shed.status_code, 429)
+        self.assertEqual(shed['Retry-After'], '1')
+        self.assertIsNone(middleware(factory.post(reverse('assignment-list'))))
+        self.assertIsNone(middleware(factory.get(reverse('assignment-detail', args=[1]))))
+
+    def test_admission_control_counts_streams_until_closed(self):
+        middleware = AdmissionControlMiddleware(lambda request: StreamingHttpResponse(iter([b'[', b']'])))
+        response = middleware(RequestFactory().get(reverse('assignment-list')))
+        self.assertEqual(middleware.in_flight, 1)
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+        self.assertEqual(middleware.in_flight, 0)
+        response.close()
+        self.assertEqual(middleware.in_flight, 0)
+
+        # closed before the server read any of it
+        response = middleware(RequestFactory().get(reverse('assignment-list')))
+        self.assertEqual(middleware.in_flight, 1)
+        response.close()
+        self.assertEqual(middleware.in_flight, 0)
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.data = {
+            'title': 'New Project',
+            'description': 'New Description',
+            'organization': self.org.id,
+            'created_by_id': self.admin.id,
+            'employee_ids': [self.admin.id],
+            'start_date': timezone.now().isoformat(),
+            'end_date': (timezone.now() + timedelta(days=30)).isoformat(),
+        }
+
+    def test_retry_replays_first_response(self):
+        url = reverse('assignment-list')
+        first = self.client.post(url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        retry = self.client.post(url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Assignment.objects.count(), 1)
+
+    def test_key_reused_with_different_payload(self):
+        url = reverse('assignment-list')
+        self.client.post(url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.data['title'] = 'Other Project'
+        response = self.client.post(url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_expired_keys_are_reclaimed(self):
+        url = reverse('assignment-list')
+        self.client.post(url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.client.post(url, self.data, format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(Assignment.objects.count(), 2)
+        self.assertEqual(IdempotencyRecord.objects.count(), 1)
+
+class AssigneeDiffTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.interns = Employee.objects.bulk_create([
+            Employee(first_name='Intern', last_name=str(i), email=f'intern{i}@test.com', phone='+1-555-2000',
+                     role='INTERN', organization=self.org, joining_date='2024-01-01')
+            for i in range(30)
+        ])
+        self.assignment = Assignment.objects.create(
+            title='Test Project',
+            description='Test Description',
+            organization=self.org,
+            created_by=self.admin,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=30)
+        )
+        self.assignment.set_assignees([intern.id for intern in self.interns])
+
+    def assigned_ids(self):
+        return set(self.assignment.assigned_to.values_list('id', flat=True))
+
+    def test_set_assignees_applies_only_the_difference(self):
+        wanted = [intern.id for intern in self.interns[1:]] + [self.admin.id, 999999]
+        # validate ids, read current rows, one insert, one delete
+        with self.assertNumQueries(4):
+            self.assignment.set_assignees(wanted)
+        self.assertEqual(self.assigned_ids(), set(wanted) - {999999})
+
+    def test_patch_adds_and_removes(self):
+        url = reverse('assignment-assignees', args=[self.assignment.id])
+        response = self.client.patch(url, {'add': [self.admin.id], 'remove': [self.interns[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(self.admin.id, self.assigned_ids())
+        self.assertNotIn(self.interns[0].id, self.assigned_ids())
+        self.assertEqual(len(response.data['assigned_to']), 30)
+
+        response = self.client.patch(url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class EmployeeEmailLookupTests(APITestCase):
+    def setUp(self):
+        email_resolver.clear()
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.intern = Employee.objects.create(
+            first_name='Ivan', last_name='Intern', email='Ivan.Intern@Test.com', phone='+1-555-1001',
+            role='INTERN', organization=self.org, joining_date='2024-01-02'
+        )
+
+    def test_lookup_by_email_is_case_insensitive(self):
+        self.assertEqual(self.intern.email, 'ivan.intern@test.com')
+        response = self.client.get(reverse('employee-detail', args=['IVAN.intern@test.com']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.intern.id)
+        response = self.client.get(reverse('employee-detail', args=['nobody@test.com']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_resolver_cache_hits_and_invalidation(self):
+        self.assertEqual(email_resolver.resolve('ivan.intern@test.com'), self.intern.id)
+        with self.assertNumQueries(0):
+            email_resolver.resolve('Ivan.Intern@test.com')
+        self.intern.email = 'ivan@test.com'
+        self.intern.save()
+        self.assertEqual(len(email_resolver), 0)
+        self.assertIsNone(email_resolver.resolve('ivan.intern@test.com'))
+
+    def test_resolver_entries_expire(self):
+        self.assertEqual(email_resolver.resolve('ivan.intern@test.com'), self.intern.id)
+        # a change made elsewhere: no signal reaches this process's cache
+        Employee.objects.filter(pk=self.intern.pk).update(email='ivan@test.com')
+        self.assertEqual(email_resolver.resolve('ivan.intern@test.com'), self.intern.id)
+        later = time.monotonic() + email_resolver.ttl + 1
+        with patch('schema.resolvers.time.monotonic', return_value=later):
+            self.assertIsNone(email_resolver.resolve('ivan.intern@test.com'))
+        self.assertEqual(len(email_resolver), 0)
+
+    def test_create_rejects_case_variant_of_existing_email(self):
+        response = self.client.post(reverse('employee-list'), {
+            'first_name': 'Ivan', 'last_name': 'Again', 'email': ' IVAN.Intern@test.com', 'phone': '+1-555-1002',
+            'role': 'INTERN', 'organization': self.org.id, 'joining_date': '2024-01-03',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+        response = self.client.patch(
+            reverse('employee-detail', args=[self.intern.id]), {'email': 'IVAN.INTERN@test.com'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_employee_id_params_accept_email(self):
+        response = self.client.get(reverse('assignment-by-employee'), {'employee_id': 'ivan.intern@test.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('assignment-my-assignments'), {'employee_id': 'missing@test.com'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class PurgeTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.other_org = Organization.objects.create(
+            name='Other Corp',
+            address='Other Address',
+            contact_email='other@test.com',
+            contact_phone='+1-555-4321'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.outsider = Employee.objects.create(
+            first_name='Olga', last_name='Other', email='olga@test.com', phone='+1-555-1002',
+            role='INTERN', organization=self.other_org, joining_date='2024-01-01'
+        )
+        for i in range(5):
+            assignment = Assignment.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                organization=self.org,
+                created_by=self.admin,
+                start_date=timezone.now(),
+                end_date=timezone.now() + timedelta(days=1),
+                status='IN_PROGRESS'
+            )
+            assignment.set_assignees([self.admin.id, self.outsider.id])
+            assignment.submit('answer')
+
+    def test_destroy_soft_deletes_then_purges(self):
+        response = self.client.delete(reverse('organization-detail', args=[self.org.id]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        response = self.client.get(reverse('organization-list'))
+        self.assertEqual([row['id'] for row in response.data], [self.other_org.id])
+        response = self.client.get(reverse('employee-detail', args=[self.admin.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        jobs.work('test-worker', burst=True)
+        self.assertFalse(Organization.objects.filter(pk=self.org.id).exists())
+        self.assertEqual(Assignment.objects.count(), 0)
+        self.assertEqual(Submission.objects.count(), 0)
+        self.assertEqual(Assignment.assigned_to.through.objects.count(), 0)
+        self.assertTrue(Employee.objects.filter(pk=self.outsider.id).exists())
+
+    def test_soft_deleted_rows_are_hidden_before_purge(self):
+        assignment = Assignment.objects.filter(organization=self.org).first()
+        AssignmentEvaluation.objects.create(assignment=assignment, score=80, feedback='Good')
+        self.assertEqual(email_resolver.resolve('ada@test.com'), self.admin.id)
+        self.client.delete(reverse('organization-detail', args=[self.org.id]))
+
+        self.assertEqual(self.client.get(reverse('assignment-list')).data, [])
+        response = self.client.get(reverse('assignment-detail', args=[assignment.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('assignment-by-organization'), {'organization_id': self.org.id})
+        self.assertEqual(response.data, [])
+        response = self.client.get(reverse('assignment-detail', args=[assignment.id]) + 'timeline/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('assignmentevaluation-by-assignment'), {'assignment_id': assignment.id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('assignment-my-assignments'), {'employee_id': self.outsider.id})
+        self.assertEqual(response.data, [])
+        response = self.client.get(reverse('assignment-my-assignments'), {'employee_id': 'ada@test.com'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(email_resolver.resolve('ada@test.com'))
+
+    def test_soft_deleted_employee_frees_email(self):
+        self.client.delete(reverse('employee-detail', args=[self.outsider.id]))
+        self.assertIsNone(email_resolver.resolve('olga@test.com'))
+        response = self.client.post(reverse('employee-list'), {
+            'first_name': 'Olga', 'last_name': 'Other', 'email': 'Olga@test.com', 'phone': '+1-555-1002',
+            'role': 'INTERN', 'organization': self.other_org.id, 'joining_date': '2024-02-01',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(email_resolver.resolve('olga@test.com'), response.data['id'])
+
+    def test_purge_requires_soft_delete(self):
+        response = self.client.post(reverse('job-list'), {
+            'kind': 'purge_organization', 'payload': {'organization_id': self.org.id}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        job = jobs.enqueue('purge_organization', {'organization_id': self.org.id})
+        jobs.work('test-worker', burst=True)
+        job.refresh_from_db()
+        self.assertIn('skipped', job.result)
+        self.assertTrue(Organization.objects.filter(pk=self.org.id).exists())
+        self.assertEqual(Assignment.objects.count(), 5)
+
+    def test_batched_delete_uses_bounded_batches(self):
+        through = Assignment.assigned_to.through
+        self.assertEqual(batched_delete(through.objects.filter(employee_id=self.outsider.id), batch_size=2), 5)
+        self.assertEqual(through.objects.count(), 5)
+
+    def test_employee_purge(self):
+        response = self.client.delete(reverse('employee-detail', args=[self.admin.id]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        jobs.work('test-worker', burst=True)
+        self.assertFalse(Employee.objects.filter(pk=self.admin.id).exists())
+        self.assertEqual(Assignment.objects.count(), 0)
+        self.assertTrue(Organization.objects.filter(pk=self.org.id).exists())
+
+
+class AssignmentTimelineTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.intern = Employee.objects.create(
+            first_name='Ivan', last_name='Intern', email='ivan@test.com', phone='+1-555-1001',
+            role='INTERN', organization=self.org, joining_date='2024-01-01'
+        )
+        # transitions are buffered on commit, which the test transaction never does
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignment = Assignment.objects.create(
+                title='Task',
+                description='Test Description',
+                organization=self.org,
+                created_by=self.admin,
+                start_date=timezone.now(),
+                end_date=timezone.now() + timedelta(days=1)
+            )
+        self.assertEqual(audit_log.flush(), 1)
+        self.assignment.add_assignees([self.intern.id])
+
+    def test_timeline_records_each_transition(self):
+        url = reverse('assignment-detail', args=[self.assignment.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'{url}mark_as_in_progress/', {'employee_id': self.intern.email})
+            self.client.post(f'{url}update_status/', {
+                'employee_id': self.intern.id, 'status': 'SUBMITTED', 'submission_text': 'done'
+            })
+            self.client.post(reverse('assignmentevaluation-list'), {
+                'assignment': self.assignment.id, 'score': 90, 'feedback': 'Good'
+            })
+        self.assertEqual(len(audit_log), 3)
+
+        response = self.client.get(f'{url}timeline/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['from_status'], row['to_status'], row['actor']) for row in response.data],
+            [
+                ('', 'PENDING', None),
+                ('PENDING', 'IN_PROGRESS', self.intern.id),
+                ('IN_PROGRESS', 'SUBMITTED', self.intern.id),
+                ('SUBMITTED', 'EVALUATED', self.admin.id),
+            ]
+        )
+        self.assertEqual(response.data[1]['actor_name'], 'Ivan Intern')
+        self.assertEqual(len(audit_log), 0)
+
+    def test_saves_without_status_change_are_not_logged(self):
+        assignment = Assignment.objects.get(pk=self.assignment.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment.title = 'Renamed'
+            assignment.save()
+        self.assertEqual(audit_log.flush(), 0)
+
+    def test_rolled_back_transitions_are_not_logged(self):
+        assignment = Assignment.objects.get(pk=self.assignment.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                assignment.status = 'IN_PROGRESS'
+                assignment.save()
+                raise RuntimeError('abort')
+        self.assertEqual(len(audit_log), 0)
+
+    def test_buffers_are_per_thread(self):
+        entry = AssignmentTransition(
+            assignment_id=self.assignment.pk, to_status='IN_PROGRESS', created_at=timezone.now()
+        )
+        other = threading.Thread(target=audit_log._append, args=('default', entry))
+        other.start()
+        other.join()
+        self.assertEqual(audit_log.flush(), 0)
+
+    def test_buffer_flushes_on_size(self):
+        buffer = AuditBuffer(max_size=3, max_age=60)
+        for to_status in ['IN_PROGRESS', 'SUBMITTED']:
+            with self.captureOnCommitCallbacks(execute=True):
+                buffer.record(self.assignment, 'PENDING', to_status)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(AssignmentTransition.objects.filter(to_status='SUBMITTED').count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer.record(self.assignment, 'SUBMITTED', 'EVALUATED')
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(AssignmentTransition.objects.filter(assignment=self.assignment).count(), 4)
+
+    def test_failed_flush_keeps_entries(self):
+        buffer = AuditBuffer(max_size=10, max_age=60)
+        with self.captureOnCommitCallbacks(execute=True):
+            buffer.record(self.assignment, 'PENDING', 'IN_PROGRESS')
+        with patch('django.db.models.query.QuerySet.bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                buffer.flush()
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.flush(), 1)
+
+    def test_timeline_unknown_assignment(self):
+        response = self.client.get(reverse('assignment-detail', args=[999999]) + 'timeline/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SnapshotTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.intern = Employee.objects.create(
+            first_name='Ivan', last_name='Intern', email='ivan@test.com', phone='+1-555-1001',
+            role='INTERN', organization=self.org, joining_date='2024-01-01', is_active=False
+        )
+        for i in range(3):
+            assignment = Assignment.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                organization=self.org,
+                created_by=self.admin,
+                start_date=timezone.now(),
+                end_date=timezone.now() + timedelta(days=1),
+                status='IN_PROGRESS'
+            )
+            assignment.add_assignees([self.intern.id])
+            assignment.submit('answer ' * 500)
+        jobs.enqueue('rebuild_stats', {'organization_id': self.org.id})
+
+    def _empty_tables(self):
+        for level in reversed(snapshot.restore_levels(snapshot.snapshot_models())):
+            for model in level:
+                model._base_manager.all()._raw_delete('default')
+
+    def test_dump_and_restore_round_trip(self):
+        manifest = snapshot.dump(self.directory, workers=1, batch_size=2)
+        rows = {entry['table']: entry['rows'] for entry in manifest['tables']}
+        self.assertEqual(rows['schema_assignment_assigned_to'], 3)
+        self.assertEqual(rows['schema_submission'], 3)
+
+        self._empty_tables()
+        restored = snapshot.restore(self.directory, workers=1, batch_size=2)
+        self.assertEqual(restored, rows)
+
+        assignment = Assignment.objects.order_by('id').first()
+        self.assertEqual(assignment.submission_text, 'answer ' * 500)
+        self.assertEqual(list(assignment.assigned_to.values_list('id', flat=True)), [self.intern.id])
+        self.assertFalse(Employee.objects.get(pk=self.intern.id).is_active)
+        self.assertEqual(Job.objects.get(kind='rebuild_stats').payload, {'organization_id': self.org.id})
+        # sequences continue after the restored ids
+        self.assertGreater(Organization.objects.create(
+            name='Next Corp', address='Next Address', contact_email='n@test.com', contact_phone='1'
+        ).pk, self.org.pk)
+
+    def test_restore_rejects_tampered_files_and_populated_tables(self):
+        manifest = snapshot.dump(self.directory, workers=1)
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.restore(self.directory, workers=1)
+
+        entry = next(entry for entry in manifest['tables'] if entry['table'] == 'schema_employee')
+        with open(f'{self.directory}/{entry["file"]}', 'ab') as handle:
+            handle.write(b'tampered')
+        self._empty_tables()
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.restore(self.directory, workers=1)
+        self.assertEqual(Organization.objects.count(), 0)
+
+
+class StreamingListTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.intern = Employee.objects.create(
+            first_name='Ivan', last_name='Intern', email='ivan@test.com', phone='+1-555-1001',
+            role='INTERN', organization=self.org, joining_date='2024-01-01'
+        )
+        for i in range(5):
+            assignment = Assignment.objects.create(
+                title=f'Task {i}',
+                description='Test Description',
+                organization=self.org,
+                created_by=self.admin,
+                start_date=timezone.now(),
+                end_date=timezone.now() + timedelta(days=1)
+            )
+            assignment.add_assignees([self.admin.id, self.intern.id])
+
+    def test_stream_matches_buffered_response(self):
+        url = reverse('assignment-pending')
+        buffered = self.client.get(url)
+        streamed = self.client.get(url, {'stream': '1'})
+        self.assertFalse(buffered.streaming)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed['Content-Type'], 'application/json')
+        strip = lambda rows: [{k: v for k, v in row.items() if k != 'time_remaining'} for row in rows]
+        self.assertEqual(strip(json.loads(b''.join(streamed.streaming_content))), strip(json.loads(buffered.content)))
+
+    @patch('schema.views.AssignmentViewSet.stream_chunk_size', 2)
+    def test_stream_prefetches_per_chunk(self):
+        response = self.client.get(reverse('assignment-by-organization'), {
+            'organization_id': self.org.id, 'stream': 'true'
+        })
+        # one cursor read in chunks, plus one assigned_to prefetch per chunk of two
+        with self.assertNumQueries(4):
+            rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([len(row['assigned_to']) for row in rows], [2] * 5)
+
+    def test_empty_stream(self):
+        response = self.client.get(reverse('assignment-submitted'), {'stream': '1'})
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+    def test_default_list_streams(self):
+        response = self.client.get(reverse('employee-list'), {'stream': '1'})
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 2)
+
+
+ESSAY = (
+    'Caching trades memory for latency. A read-through cache keeps hot rows close to the application, '
+    'while write-behind batching turns many small writes into a few large ones. Invalidation remains '
+    'the hard part: every writer has to agree on when an entry stops being valid, or readers see stale data. '
+    'Time based expiry bounds staleness, explicit invalidation removes it, and versioned keys avoid races.'
+)
+
+
+class SimilarSubmissionTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        texts = [
+            ESSAY,
+            ESSAY.replace('hard part', 'difficult part'),
+            'Indexes speed up reads at the cost of slower writes and more storage on disk for every table.',
+        ]
+        self.assignments = [self._submit(text) for text in texts]
+        jobs.work('test-worker', burst=True)
+
+    def _submit(self, text, organization=None):
+        assignment = Assignment.objects.create(
+            title='Essay',
+            description='Test Description',
+            organization=organization or self.org,
+            created_by=self.admin,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+            status='IN_PROGRESS'
+        )
+        assignment.submit(text)
+        return assignment
+
+    def test_submissions_are_indexed_by_job(self):
+        self.assertEqual(set(Job.objects.values_list('kind', 'status')), {('index_submission', 'SUCCEEDED')})
+        self.assertEqual(SubmissionSignature.objects.count(), 3)
+        self.assertEqual(
+            SubmissionBucket.objects.filter(assignment=self.assignments[0]).count(), settings.SIMILARITY_BANDS
+        )
+
+    def test_similar_finds_near_duplicates_only(self):
+        response = self.client.get(reverse('assignment-similar', args=[self.assignments[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['assignment'] for row in response.data], [self.assignments[1].id])
+        self.assertGreater(response.data[0]['similarity'], 0.7)
+
+    def test_other_organizations_are_not_candidates(self):
+        other = Organization.objects.create(
+            name='Other Corp', address='Other Address', contact_email='o@test.com', contact_phone='1'
+        )
+        self._submit(ESSAY, organization=other)
+        jobs.work('test-worker', burst=True)
+        matches = similarity.similar(self.assignments[0])
+        self.assertEqual([assignment_id for _, assignment_id in matches], [self.assignments[1].id])
+
+    def test_estimate_tracks_jaccard(self):
+        a = similarity.shingles(ESSAY)
+        b = similarity.shingles(ESSAY.replace('hard part', 'difficult part'))
+        jaccard = len(a & b) / len(a | b)
+        estimate = similarity.estimate(similarity.minhash(a), similarity.minhash(b))
+        self.assertAlmostEqual(estimate, jaccard, delta=0.15)
+
+    def test_similar_does_not_write_for_unindexed_submissions(self):
+        SubmissionBucket.objects.all().delete()
+        SubmissionSignature.objects.all().delete()
+        self.assertEqual(similarity.similar(self.assignments[0]), [])
+        self.assertEqual(SubmissionSignature.objects.count(), 0)
+
+    def test_backfill_indexes_missing_signatures(self):
+        SubmissionBucket.objects.all().delete()
+        SubmissionSignature.objects.all().delete()
+        call_command('index_submissions', processes=1, batch_size=2, stdout=StringIO())
+        self.assertEqual(SubmissionSignature.objects.count(), 3)
+        self.assertEqual(len(similarity.similar(self.assignments[1])), 1)
+
+
+class AutogradeTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.rubric = {
+            'keywords': {'cache': 30, 'invalidation': 30},
+            'checks': [{'pattern': r'^Summary:', 'weight': 20, 'label': 'Has a summary line'}],
+            'min_words': 5,
+            'max_words': 50,
+            'length_weight': 20,
+        }
+        self.full = self._submitted('Summary: a cache needs invalidation to stay correct.')
+        self.partial = self._submitted('A cache makes reads fast.')
+        self.no_rubric = self._submitted('Summary: cache invalidation.', rubric=False)
+
+    def _submitted(self, text, rubric=True):
+        assignment = Assignment.objects.create(
+            title='Essay',
+            description='Test Description',
+            organization=self.org,
+            created_by=self.admin,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(days=1),
+            status='IN_PROGRESS'
+        )
+        if rubric:
+            response = self.client.put(
+                reverse('assignment-rubric', args=[assignment.id]), self.rubric, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assignment.submit(text)
+        return assignment
+
+    def test_rubric_scoring(self):
+        compiled = grading.compile_rubric(self.rubric)
+        self.assertEqual(compiled.grade('Summary: a cache needs invalidation to stay correct.')[0], 100)
+        score, feedback = compiled.grade('A cache makes reads fast.')
+        self.assertEqual(score, 50)
+        self.assertIn('Missing keyword: invalidation', feedback)
+        self.assertIn('Failed check: Has a summary line', feedback)
+
+    def test_autograde_writes_drafts_then_confirm(self):
+        response = self.client.post(reverse('assignmentevaluation-autograde'), {'organization_id': self.org.id})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        jobs.work('test-worker', burst=True)
+        job = Job.objects.get(kind='autograde')
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertEqual(job.result['graded'], 2)
+
+        drafts = {evaluation.assignment_id: evaluation for evaluation in AssignmentEvaluation.objects.all()}
+        self.assertEqual(sorted(drafts), [self.full.id, self.partial.id])
+        self.assertTrue(all(draft.is_draft for draft in drafts.values()))
+        self.assertEqual(drafts[self.partial.id].score, 50)
+        self.assertEqual(Assignment.objects.get(pk=self.partial.id).status, 'SUBMITTED')
+
+        url = reverse('assignmentevaluation-detail', args=[drafts[self.partial.id].id])
+        response = self.client.post(f'{url}confirm/', {'score': 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_draft'])
+        self.assertEqual(response.data['score'], 60)
+        self.assertEqual(Assignment.objects.get(pk=self.partial.id).status, 'EVALUATED')
+        response = self.client.post(f'{url}confirm/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_manual_evaluation_replaces_draft(self):
+        grading.autograde(self.org.id)
+        response = self.client.post(reverse('assignmentevaluation-list'), {
+            'assignment': self.full.id, 'score': 95, 'feedback': 'Great'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        evaluation = AssignmentEvaluation.objects.get(assignment=self.full)
+        self.assertFalse(evaluation.is_draft)
+        self.assertEqual(evaluation.score, 95)
+
+    def test_invalid_check_pattern(self):
+        response = self.client.put(
+            reverse('assignment-rubric', args=[self.no_rubric.id]),
+            {'checks': [{'pattern': '(unclosed'}]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Rubric.objects.filter(assignment=self.no_rubric).exists())
+
+    def test_invalid_weights(self):
+        url = reverse('assignment-rubric', args=[self.no_rubric.id])
+        for rubric in (
+            {'checks': [{'pattern': 'y', 'weight': '5'}]},
+            {'checks': [{'pattern': 'y', 'weight': -5}]},
+            {'keywords': {'cache': 0}, 'length_weight': 0},
+        ):
+            response = self.client.put(url, rubric, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, rubric)
+        self.assertFalse(Rubric.objects.filter(assignment=self.no_rubric).exists())
+
+    def test_score_is_clamped(self):
+        compiled = grading.CompiledRubric(keywords={'cache': 10, 'stale': -5})
+        self.assertEqual(compiled.grade('cache')[0], 100)
+
+
+class AssignmentTemplateTests(APITestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name='Test Corp',
+            address='Test Address',
+            contact_email='test@test.com',
+            contact_phone='+1-555-1234'
+        )
+        self.admin = Employee.objects.create(
+            first_name='Ada', last_name='Admin', email='ada@test.com', phone='+1-555-1000',
+            role='ADMIN', organization=self.org, joining_date='2024-01-01'
+        )
+        self.interns = [
+            Employee.objects.create(
+                first_name='Intern', last_name=str(i), email=f'intern{i}@test.com', phone='+1-555-1001',
+                role='INTERN', organization=self.org, joining_date='2024-01-01'
+            )
+            for i in range(3)
+        ]
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _template(self, **overrides):
+        data = {
+            'title': 'Weekly report',
+            'description': 'What did you ship this week?',
+            'organization': self.org.id,
+            'created_by': self.admin.id,
+            'recurrence': 'WEEKLY',
+            'starts_at': (self.now - timedelta(days=10)).isoformat(),
+            'duration': '5 00:00:00',
+            'target': 'ROLE',
+            'target_role': 'INTERN',
+        }
+        data.update(overrides)
+        response = self.client.post(reverse('assignmenttemplate-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return AssignmentTemplate.objects.get(pk=response.data['id'])
+
+    def test_upcoming_periods_skip_closed_windows(self):
+        template = self._template()
+        periods = recurrence.upcoming_periods(template, now=self.now, ahead=timedelta(days=14))
+        # days -10 and -3 have closed or are open (-3 + 5 > 0), then +4 and +11
+        self.assertEqual(periods, [template.starts_at + timedelta(days=d) for d in (7, 14, 21)])
+
+    def test_monthly_periods_clamp_to_month_end(self):
+        template = AssignmentTemplate(starts_at=datetime(2024, 1, 31, tzinfo=timezone.utc), recurrence='MONTHLY', interval=1)
+        self.assertEqual(recurrence.period_start(template, 1), datetime(2024, 2, 29, tzinfo=timezone.utc))
+
+    def test_generate_is_idempotent_per_period(self):
+        template = self._template()
+        created = recurrence.generate(template, now=self.now, ahead=timedelta(days=14))
+        self.assertEqual(created, 3)
+        self.assertEqual(recurrence.generate(template, now=self.now, ahead=timedelta(days=14)), 0)
+
+        assignments = Assignment.objects.filter(template=template).order_by('period_start')
+        self.assertEqual(assignments.count(), 3)
+        self.assertEqual(
+            sorted(assignments[0].assigned_to.values_list('id', flat=True)), [intern.id for intern in self.interns]
+        )
+        self.assertEqual(assignments[0].end_date, assignments[0].period_start + timedelta(days=5))
+        self.assertEqual(AssignmentTransition.objects.filter(assignment__template=template).count(), 3)
+
+    def test_periods_created_elsewhere_get_no_second_transition(self):
+        template = self._template()
+        first = recurrence.upcoming_periods(template, now=self.now, ahead=timedelta(days=14))[0]
+        # as if a concurrent generator committed this period first
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Assignment.objects.create(
+                title=template.title, description=template.description, organization=self.org,
+                created_by=self.admin, start_date=first, end_date=first + template.duration,
+                template=template, period_start=first,
+            )
+        audit_log.flush()
+        self.assertEqual(recurrence.generate(template, now=self.now, ahead=timedelta(days=14)), 2)
+        self.assertEqual(AssignmentTransition.objects.filter(assignment=other).count(), 1)
+        self.assertEqual(AssignmentTransition.objects.filter(assignment__template=template).count(), 3)
+
+    def test_explicit_employee_target_through_job(self):
+        template = self._template(target='EMPLOYEES', target_role='', target_employees=[self.interns[0].id])
+        response = self.client.post(reverse('assignmenttemplate-generate', args=[template.id]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        jobs.work('test-worker', burst=True)
+        self.assertEqual(Job.objects.get().status, 'SUCCEEDED')
+        for assignment in Assignment.objects.filter(template=template):
+            self.assertEqual(list(assignment.assigned_to.values_list('id', flat=True)), [self.interns[0].id])
+
+    def test_inactive_template_is_not_generated(self):
+        template = self._template(is_active=False)
+        response = self.client.post(reverse('assignmenttemplate-generate', args=[template.id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.filter(kind='generate_assignments').exists())
+
+    def test_template_validation(self):
+        response = self.client.post(reverse('assignmenttemplate-list'), {
+            'title': 'Weekly report', 'description': 'x', 'organization': self.org.id,
+            'created_by': self.interns[0].id, 'starts_at': self.now.isoformat(), 'duration': '1 00:00:00',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('assignmenttemplate-list'), {
+            'title': 'Weekly report', 'description': 'x', 'organization': self.org.id,
+            'created_by': self.admin.id, 'starts_at': self.now.isoformat(), 'duration': '1 00:00:00',
+            'target': 'ROLE',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_applied_to_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['cache_size'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(f'{directory}/tuned.sqlite3')
+            sqlite_tuning.apply_pragmas(db)
+            self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            self.assertEqual(db.execute('PRAGMA synchronous').fetchone()[0], 1)
+            db.close()
+
+    def _max_concurrency(self, method):
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def get_response(request):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        middleware = WriteLaneMiddleware(get_response)
+        request = getattr(RequestFactory(), method)(reverse('assignment-list'))
+        threads = [threading.Thread(target=middleware, args=(request,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return peak[0]
+
+    def test_outside_write_lane_lets_other_writers_in(self):
+        entered = threading.Event()
+
+        def other_writer():
+            with sqlite_tuning.write_lane():
+                entered.set()
+
+        with sqlite_tuning.write_lane(), sqlite_tuning.write_lane():
+            thread = threading.Thread(target=other_writer)
+            thread.start()
+            self.assertFalse(entered.wait(0.05))
+            with sqlite_tuning.outside_write_lane():
+                self.assertTrue(entered.wait(1))
+            thread.join()
+        with sqlite_tuning.write_lane():
+            pass
+
+    def test_write_lane_serializes_unsafe_requests_only(self):
+        self.assertEqual(self._max_concurrency('post'), 1)
+        self.assertGreater(self._max_concurrency('get'), 1)
+        with override_settings(SQLITE_WRITE_LANE=False):
+            self.assertGreater(self._max_concurrency('patch'), 1)
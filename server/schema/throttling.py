@@ -0,0 +1,85 @@
+# throttling.py
+"""Weighted token-bucket throttles.
+
+Every request spends ``cost`` tokens, looked up by view action in
+``SCHEMA_THROTTLE['COSTS']``, from two buckets: one per client and one per
+endpoint shared by all clients. The endpoint bucket is only charged once the
+client bucket has admitted the request. Buckets live in the
+``SCHEMA_THROTTLE['CACHE']`` cache alias, which should be a backend shared by
+all worker processes (file-based locally, Redis or Memcached in production).
+Updates are read-modify-write, so limits are approximate under heavy
+contention.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    'CLIENT': {'capacity': 600, 'refill_per_second': 10},
+    'ENDPOINT': {'capacity': 3000, 'refill_per_second': 50},
+    'COSTS': {'default': 1},
+}
+
+
+def throttle_settings():
+    return {**DEFAULTS, **getattr(settings, 'SCHEMA_THROTTLE', {})}
+
+
+def action_cost(view, config=None):
+    costs = (config or throttle_settings())['COSTS']
+    basename = getattr(view, 'basename', None)
+    action = getattr(view, 'action', None)
+    return costs.get(f'{basename}.{action}', costs.get(action, costs.get('default', 1)))
+
+
+class TokenBucket:
+    def __init__(self, cache, key, capacity, refill_per_second):
+        self.cache = cache
+        self.key = key
+        self.capacity = capacity
+        self.rate = refill_per_second
+
+    def consume(self, cost, now=None):
+        """Spend ``cost`` tokens; return 0 on success or the seconds until they are available"""
+        now = time.time() if now is None else now
+        tokens, updated = self.cache.get(self.key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0
+        else:
+            wait = (cost - tokens) / self.rate
+        # keep the entry only as long as it takes to refill completely
+        self.cache.set(self.key, (tokens, now), timeout=int(self.capacity / self.rate) + 1)
+        return wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Charge the client's bucket, then the endpoint's.
+
+    The shared endpoint bucket is only charged for requests the client's
+    bucket admitted, so a client over its own limit cannot drain it for
+    everyone else.
+    """
+
+    def allow_request(self, request, view):
+        config = throttle_settings()
+        if not config['ENABLED']:
+            return True
+        cache = caches[config['CACHE']]
+        cost = action_cost(view, config)
+        endpoint = f'{getattr(view, "basename", type(view).__name__)}:{getattr(view, "action", "")}'
+        self.retry_after = self._bucket(cache, f'client:{self.get_ident(request)}', config['CLIENT']).consume(cost)
+        if self.retry_after == 0:
+            self.retry_after = self._bucket(cache, f'endpoint:{endpoint}', config['ENDPOINT']).consume(cost)
+        return self.retry_after == 0
+
+    def _bucket(self, cache, key, limits):
+        return TokenBucket(cache, f'throttle:{key}', limits['capacity'], limits['refill_per_second'])
+
+    def wait(self):
+        return self.retry_after
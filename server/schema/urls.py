@@ -1,12 +1,18 @@
 # urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrganizationViewSet, EmployeeViewSet, AssignmentViewSet, AssignmentEvaluationViewSet
+from .views import (
+    OrganizationViewSet, EmployeeViewSet, AssignmentViewSet, AssignmentEvaluationViewSet, AssignmentTemplateViewSet,
+    JobViewSet, NotificationViewSet
+)
 
 router = DefaultRouter()
 router.register(r'organizations', OrganizationViewSet)
 router.register(r'employees', EmployeeViewSet)
 router.register(r'assignments', AssignmentViewSet)
 router.register(r'evaluations', AssignmentEvaluationViewSet)
+router.register(r'templates', AssignmentTemplateViewSet)
+router.register(r'jobs', JobViewSet)
+router.register(r'notifications', NotificationViewSet)
 
 urlpatterns = router.urls
\ No newline at end of file
@@ -1,34 +1,101 @@
 # views.py
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.http import FileResponse, Http404
 from django.utils import timezone
-from django.db.models import Q
-from .models import Organization, Employee, Assignment, AssignmentEvaluation
+from django.db.models import Q, Prefetch
+from django.core.exceptions import ValidationError
+from .models import (
+    ArchivedAssignment, Organization, Employee, Assignment, AssignmentEvaluation, AssignmentTemplate,
+    AssignmentTransition, Job, Notification, Rubric, Submission, SubmissionAttachment
+)
+from . import jobs, routers, similarity, submissions
+from .audit import audit_log
+from .idempotency import idempotent
+from .resolvers import email_resolver, resolve_employee_id
+from .streaming import StreamingListMixin, flag_requested
 from .serializers import (
     OrganizationSerializer, EmployeeSerializer, AssignmentSerializer,
-    AssignmentSubmissionSerializer, AssignmentEvaluationSerializer
+    AssignmentSubmissionSerializer, AssignmentEvaluationSerializer, AssigneeChangeSerializer,
+    EmployeeProfileSerializer, JobSerializer, NotificationSerializer, SubmissionSerializer,
+    SubmissionAttachmentSerializer, ArchivedAssignmentSerializer, AssignmentTransitionSerializer,
+    SimilarSubmissionSerializer, RubricSerializer, AssignmentTemplateSerializer
 )
 
-class OrganizationViewSet(viewsets.ModelViewSet):
-    queryset = Organization.objects.all()
+
+def live_employees():
+    """Employees that are not soft-deleted, in organizations that are not either"""
+    return Employee.objects.filter(deleted_at__isnull=True, organization__deleted_at__isnull=True)
+
+
+def accepted(job):
+    """202 response pointing the client at the job to poll"""
+    return Response(
+        JobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': f'/jobs/{job.pk}/'}
+    )
+
+class OrganizationViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = Organization.objects.filter(deleted_at__isnull=True)
     serializer_class = OrganizationSerializer
 
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.all()
+    def destroy(self, request, *args, **kwargs):
+        """Hide the organization now and purge its rows in a background job"""
+        organization = self.get_object()
+        organization.deleted_at = timezone.now()
+        organization.save(update_fields=['deleted_at', 'updated_at'])
+        # frees their emails for reuse; bulk updates skip the resolver's signals
+        organization.employees.filter(deleted_at__isnull=True).update(deleted_at=organization.deleted_at)
+        email_resolver.clear()
+        return accepted(jobs.enqueue('purge_organization', {'organization_id': organization.pk}))
+
+    def list(self, request, *args, **kwargs):
+        if not routers.is_sharded() or routers.current_organization() is not None:
+            return super().list(request, *args, **kwargs)
+        # no tenant in the request: read every shard in parallel
+        organizations = routers.fan_out(lambda alias: self.filter_queryset(self.get_queryset()).using(alias))
+        organizations.sort(key=lambda organization: organization.pk)
+        return Response(self.get_serializer(organizations, many=True).data)
+
+class EmployeeViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = live_employees().select_related('organization')
     serializer_class = EmployeeSerializer
+    # detail routes take either the pk or the email address
+    lookup_value_regex = '[^/]+'
+
+    def get_object(self):
+        lookup = self.kwargs[self.lookup_field]
+        if not lookup.isdigit():
+            employee_id = resolve_employee_id(lookup)
+            if employee_id is None:
+                raise Http404
+            self.kwargs[self.lookup_field] = str(employee_id)
+        return super().get_object()
+
+    def destroy(self, request, *args, **kwargs):
+        """Hide the employee now and purge their rows in a background job"""
+        employee = self.get_object()
+        employee.deleted_at = timezone.now()
+        employee.save(update_fields=['deleted_at', 'updated_at'])
+        return accepted(jobs.enqueue('purge_employee', {
+            'employee_id': employee.pk,
+            'organization_id': employee.organization_id,
+        }))
     
     @action(detail=False, methods=['get'])
     def admins(self, request):
-        admins = Employee.objects.filter(role='ADMIN')
-        serializer = self.get_serializer(admins, many=True)
-        return Response(serializer.data)
+        admins = self.get_queryset().filter(role='ADMIN')
+        if routers.is_sharded() and routers.current_organization() is None:
+            admins = routers.fan_out(lambda alias: admins.using(alias))
+            admins.sort(key=lambda employee: employee.pk)
+        return self.list_response(admins)
     
     @action(detail=False, methods=['get'])
     def interns(self, request):
-        interns = Employee.objects.filter(role='INTERN')
-        serializer = self.get_serializer(interns, many=True)
-        return Response(serializer.data)
+        interns = self.get_queryset().filter(role='INTERN')
+        return self.list_response(interns)
     
     @action(detail=False, methods=['get'])
     def by_organization(self, request):
@@ -39,14 +106,60 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        employees = Employee.objects.filter(organization_id=org_id)
-        serializer = self.get_serializer(employees, many=True)
+        employees = self.get_queryset().filter(organization_id=org_id)
+        return self.list_response(employees)
+
+    @action(detail=True, methods=['get'])
+    def profile(self, request, pk=None):
+        """Employee, organization, assignments, evaluations and stats in one response"""
+        employee = self.get_object()
+        assignments = Assignment.objects.select_related(
+            'organization', 'created_by', 'evaluation'
+        ).prefetch_related(
+            Prefetch('assigned_to', queryset=Employee.objects.only('id', 'first_name', 'last_name', 'role'))
+        ).order_by('-end_date')
+        assigned = list(assignments.filter(assigned_to=employee))
+        created = list(assignments.filter(created_by=employee)) if employee.is_admin else []
+        serializer = EmployeeProfileSerializer({
+            'employee': employee,
+            'organization': employee.organization,
+            'assigned_assignments': assigned,
+            'created_assignments': created,
+        }, context=self.get_serializer_context())
         return Response(serializer.data)
 
-class AssignmentViewSet(viewsets.ModelViewSet):
-    queryset = Assignment.objects.all()
+class AssignmentViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    # assignments of a soft-deleted organization stay hidden until the purge job removes them
+    queryset = Assignment.objects.filter(organization__deleted_at__isnull=True)
     serializer_class = AssignmentSerializer
+    detail_actions = ('retrieve', 'submit', 'update_status')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_submission'] = self.action in self.detail_actions
+        return context
+
+    def list_queryset(self, queryset):
+        return queryset.select_related('organization', 'created_by').prefetch_related('assigned_to')
+
+    def archived_queryset(self):
+        """Archived assignments, except those of soft-deleted organizations"""
+        deleted = Organization.objects.filter(deleted_at__isnull=False).values('id')
+        return ArchivedAssignment.objects.exclude(organization_id__in=deleted)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def actor_id(self, request):
+        """Optional employee_id (or email) of whoever made the change, for the audit log"""
+        return resolve_employee_id(request.data.get('employee_id') or request.query_params.get('employee_id'))
     
+    @action(detail=False, methods=['post'])
+    def export(self, request):
+        job = jobs.enqueue('export_assignments', {'organization_id': request.data.get('organization_id')})
+        return accepted(job)
+
     @action(detail=True, methods=['patch'])
     def mark_as_in_progress(self, request, pk=None):
         assignment = self.get_object()
@@ -57,11 +170,26 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             )
         
         assignment.status = 'IN_PROGRESS'
+        assignment.audit_actor_id = self.actor_id(request)
         assignment.save()
         serializer = self.get_serializer(assignment)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['patch'])
+    def assignees(self, request, pk=None):
+        """Add or remove assignees without resending the full list"""
+        assignment = self.get_object()
+        serializer = AssigneeChangeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if serializer.validated_data['add']:
+            assignment.add_assignees(serializer.validated_data['add'])
+        if serializer.validated_data['remove']:
+            assignment.remove_assignees(serializer.validated_data['remove'])
+        return Response(self.get_serializer(assignment).data)
+
     @action(detail=True, methods=['post'])
+    @idempotent
     def submit(self, request, pk=None):
         assignment = self.get_object()
         serializer = AssignmentSubmissionSerializer(data=request.data)
@@ -70,9 +198,10 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         try:
+            assignment.audit_actor_id = self.actor_id(request)
             assignment.submit(serializer.validated_data['submission_text'])
             return Response(
-                AssignmentSerializer(assignment).data,
+                self.get_serializer(assignment).data,
                 status=status.HTTP_200_OK
             )
         except Exception as e:
@@ -91,18 +220,17 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            employee = Employee.objects.get(id=employee_id)
+            employee = live_employees().get(id=resolve_employee_id(employee_id))
             if employee.is_admin:
                 # For admins, show both created and assigned assignments
-                assignments = Assignment.objects.filter(
+                assignments = self.get_queryset().filter(
                     Q(created_by=employee) | Q(assigned_to=employee)
                 ).distinct()
             else:
                 # For interns, show only assigned assignments
-                assignments = employee.assigned_assignments.all()
+                assignments = self.get_queryset().filter(assigned_to=employee)
             
-            serializer = self.get_serializer(assignments, many=True)
-            return Response(serializer.data)
+            return self.list_response(assignments)
         except Employee.DoesNotExist:
             return Response(
                 {"error": "Employee not found"},
@@ -118,56 +246,66 @@ class AssignmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        assignments = Assignment.objects.filter(organization_id=org_id)
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        assignments = self.get_queryset().filter(organization_id=org_id)
+        return self.list_response(assignments)
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        assignments = Assignment.objects.filter(status='PENDING')
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        assignments = self.get_queryset().filter(status='PENDING')
+        return self.list_response(assignments)
     
     @action(detail=False, methods=['get'])
     def in_progress(self, request):
-        assignments = Assignment.objects.filter(status='IN_PROGRESS')
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        assignments = self.get_queryset().filter(status='IN_PROGRESS')
+        return self.list_response(assignments)
     
     @action(detail=False, methods=['get'])
     def submitted(self, request):
-        assignments = Assignment.objects.filter(status='SUBMITTED')
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        assignments = self.get_queryset().filter(status='SUBMITTED')
+        return self.list_response(assignments)
     
     @action(detail=False, methods=['get'])
     def evaluated(self, request):
-        assignments = Assignment.objects.filter(status='EVALUATED')
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        assignments = self.get_queryset().filter(status='EVALUATED')
+        org_id = request.query_params.get('organization_id')
+        if org_id:
+            assignments = assignments.filter(organization_id=org_id)
+        if not flag_requested(request, 'include_archived'):
+            return self.list_response(assignments)
+        archived = self.archived_queryset().order_by('id')
+        if org_id:
+            archived = archived.filter(organization_id=org_id)
+        return self.list_response(assignments, extra=[(archived, ArchivedAssignmentSerializer)])
+
+    @action(detail=False, methods=['get'])
+    def archived(self, request):
+        """Assignments moved to the archive; only read when asked for"""
+        archived = self.archived_queryset().order_by('-archived_at', 'id')
+        org_id = request.query_params.get('organization_id')
+        if org_id:
+            archived = archived.filter(organization_id=org_id)
+        return Response(ArchivedAssignmentSerializer(archived, many=True).data)
     
     @action(detail=False, methods=['get'])
     def deadline_approaching(self, request):
         now = timezone.now()
         # Get assignments ending within the next 3 days but not yet ended
         three_days_later = now + timezone.timedelta(days=3)
-        assignments = Assignment.objects.filter(
+        assignments = self.get_queryset().filter(
             end_date__gte=now,
             end_date__lte=three_days_later,
             status__in=['PENDING', 'IN_PROGRESS']
         )
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        return self.list_response(assignments)
     
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         now = timezone.now()
-        assignments = Assignment.objects.filter(
+        assignments = self.get_queryset().filter(
             end_date__lt=now,
             status__in=['PENDING', 'IN_PROGRESS']
         )
-        serializer = self.get_serializer(assignments, many=True)
-        return Response(serializer.data)
+        return self.list_response(assignments)
     
     @action(detail=False, methods=['get'])
     def my_assignments(self, request):
@@ -177,15 +315,15 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             return Response({"error": "employee_id is required"}, status=400)
             
         try:
-            employee = Employee.objects.get(id=employee_id)
+            employee = live_employees().get(id=resolve_employee_id(employee_id))
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found"}, status=404)
             
-        assignments = self.queryset.filter(assigned_to=employee)
-        serializer = AssignmentSerializer(assignments, many=True)
-        return Response(serializer.data)
+        assignments = self.get_queryset().filter(assigned_to=employee)
+        return self.list_response(assignments)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def update_status(self, request, pk=None):
         """Update assignment status for an employee"""
         assignment = self.get_object()
@@ -196,7 +334,7 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             return Response({"error": "employee_id and status are required"}, status=400)
             
         try:
-            employee = Employee.objects.get(id=employee_id)
+            employee = live_employees().get(id=resolve_employee_id(employee_id))
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found"}, status=404)
             
@@ -211,17 +349,156 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             return Response({"error": "Assignment deadline has passed"}, status=400)
             
         assignment.status = new_status
+        assignment.audit_actor_id = employee.pk
         if new_status == 'SUBMITTED':
             assignment.submission_date = timezone.now()
-            assignment.submission_text = request.data.get('submission_text', '')
-        assignment.save()
+            assignment.set_submission(request.data.get('submission_text', ''))
+        assignment.save(update_fields=['status', 'submission_date', 'updated_at'])
         
-        serializer = AssignmentSerializer(assignment)
+        serializer = self.get_serializer(assignment)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Status transitions in order; archived assignments keep theirs"""
+        if not str(pk).isdigit():
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        audit_log.flush()
+        if not (self.get_queryset().filter(pk=pk).exists() or self.archived_queryset().filter(pk=pk).exists()):
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        transitions = AssignmentTransition.objects.filter(assignment_id=pk).select_related('actor').order_by(
+            'created_at', 'id'
+        )
+        return Response(AssignmentTransitionSerializer(transitions, many=True).data)
+
+    @action(detail=True, methods=['get', 'put'])
+    def rubric(self, request, pk=None):
+        """Auto-grading rubric of the assignment"""
+        assignment = self.get_object()
+        rubric = Rubric.objects.filter(assignment=assignment).first()
+        if request.method == 'GET':
+            if rubric is None:
+                return Response({"error": "Assignment has no rubric"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(RubricSerializer(rubric).data)
+        serializer = RubricSerializer(rubric, data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(assignment=assignment)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Other submissions in the organization that are near-duplicates of this one"""
+        assignment = self.get_object()
+        if not Submission.objects.filter(assignment_id=assignment.pk).exists():
+            return Response({"error": "Assignment has no submission"}, status=status.HTTP_404_NOT_FOUND)
+        threshold = request.query_params.get('threshold')
+        try:
+            threshold = float(threshold) if threshold is not None else None
+        except ValueError:
+            return Response({"error": "threshold must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        matches = similarity.similar(assignment, threshold=threshold)
+        others = self.get_queryset().prefetch_related('assigned_to').in_bulk([pk for _, pk in matches])
+        return Response(SimilarSubmissionSerializer([
+            {'assignment': others[other_id], 'similarity': round(score, 3)}
+            for score, other_id in matches if other_id in others
+        ], many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def submission(self, request, pk=None):
+        """Submission body and attachments, loaded only on request"""
+        try:
+            submission = Submission.objects.prefetch_related('attachments').select_related(
+                'assignment'
+            ).get(assignment_id=self.get_object().pk)
+        except Submission.DoesNotExist:
+            return Response({"error": "Assignment has no submission"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(SubmissionSerializer(submission).data)
+
+    @action(detail=True, methods=['post'])
+    def attachments(self, request, pk=None):
+        assignment = self.get_object()
+        if assignment.status not in ('IN_PROGRESS', 'SUBMITTED'):
+            return Response(
+                {"error": f"Attachments cannot be added to {assignment.status} assignments"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            submission = assignment.submission
+        except Submission.DoesNotExist:
+            submission = assignment.set_submission('')
+        attachment = submissions.store_attachment(submission, uploaded)
+        return Response(SubmissionAttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path=r'attachments/(?P<attachment_id>[0-9]+)')
+    def download_attachment(self, request, pk=None, attachment_id=None):
+        try:
+            attachment = SubmissionAttachment.objects.get(
+                pk=attachment_id, submission__assignment_id=self.get_object().pk
+            )
+        except SubmissionAttachment.DoesNotExist:
+            raise Http404
+        try:
+            handle = open(submissions.attachment_path(attachment.file.name), 'rb')
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(
+            handle,
+            as_attachment=True,
+            filename=attachment.original_name,
+            content_type=attachment.content_type or None,
+        )
+
 class AssignmentEvaluationViewSet(viewsets.ModelViewSet):
-    queryset = AssignmentEvaluation.objects.all()
+    queryset = AssignmentEvaluation.objects.filter(assignment__organization__deleted_at__isnull=True)
     serializer_class = AssignmentEvaluationSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        draft = self.request.query_params.get('draft')
+        if draft is not None:
+            queryset = queryset.filter(is_draft=draft.lower() in ('1', 'true', 'yes'))
+        return queryset
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'])
+    def autograde(self, request):
+        """Score the organization's submitted assignments against their rubrics as drafts"""
+        organization_id = request.data.get('organization_id')
+        if not organization_id:
+            return Response(
+                {"error": "organization_id is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = jobs.enqueue('autograde', {
+            'organization_id': organization_id,
+            'regrade': bool(request.data.get('regrade')),
+        })
+        return accepted(job)
+
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """Turn a draft into the final evaluation, optionally adjusting score and feedback"""
+        evaluation = self.get_object()
+        if not evaluation.is_draft:
+            return Response({"error": "Evaluation is already confirmed"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            evaluation.score = int(request.data.get('score', evaluation.score))
+        except (TypeError, ValueError):
+            return Response({"error": "score must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        evaluation.feedback = request.data.get('feedback', evaluation.feedback)
+        evaluation.evaluation_date = timezone.now()
+        try:
+            evaluation.save()
+        except ValidationError as e:
+            return Response({"error": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(evaluation).data)
     
     @action(detail=False, methods=['get'])
     def by_assignment(self, request):
@@ -233,11 +510,90 @@ class AssignmentEvaluationViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            evaluation = AssignmentEvaluation.objects.get(assignment_id=assignment_id)
+            evaluation = self.get_queryset().get(assignment_id=assignment_id)
             serializer = self.get_serializer(evaluation)
             return Response(serializer.data)
         except AssignmentEvaluation.DoesNotExist:
             return Response(
                 {"error": "Evaluation for this assignment not found"},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+    @action(detail=False, methods=['post'])
+    def bulk_grade(self, request):
+        evaluations = request.data.get('evaluations')
+        if not isinstance(evaluations, list) or not evaluations:
+            return Response(
+                {"error": "evaluations must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = jobs.enqueue('bulk_grade', {'evaluations': evaluations})
+        return accepted(job)
+
+class AssignmentTemplateViewSet(viewsets.ModelViewSet):
+    queryset = AssignmentTemplate.objects.prefetch_related('target_employees').order_by('id')
+    serializer_class = AssignmentTemplateSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        organization_id = self.request.query_params.get('organization_id')
+        if organization_id:
+            queryset = queryset.filter(organization_id=organization_id)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def generate(self, request, pk=None):
+        """Materialize the template's upcoming assignments now rather than on the next scheduled run"""
+        template = self.get_object()
+        if not template.is_active:
+            return Response(
+                {"error": "Inactive templates do not generate assignments"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = jobs.enqueue('generate_assignments', {
+            'template_id': template.pk,
+            'organization_id': template.organization_id,
+        })
+        return accepted(job)
+
+class JobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Job.objects.order_by('-created_at')
+    serializer_class = JobSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save()
+        return accepted(job)
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        job = self.get_object()
+        return Response({
+            'id': job.id,
+            'status': job.status,
+            'progress': job.progress,
+            'total': job.total,
+            'percent': job.percent,
+        })
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Notification.objects.select_related('assignment').order_by('-created_at')
+    serializer_class = NotificationSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        employee_id = self.request.query_params.get('employee_id')
+        if employee_id:
+            queryset = queryset.filter(employee_id=resolve_employee_id(employee_id))
+        if self.request.query_params.get('unread'):
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        notification = self.get_object()
+        if notification.read_at is None:
+            notification.read_at = timezone.now()
+            notification.save(update_fields=['read_at'])
+        return Response(self.get_serializer(notification).data)